@@ -0,0 +1,110 @@
+from inspect import isawaitable
+
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.shortcuts import aget_object_or_404
+from drf_spectacular.utils import extend_schema
+from rest_framework.response import Response
+
+from .cache import (
+    acached_catalogue,
+    amerge_cover_subscriptions,
+    amerge_subscribed_covers
+)
+from .serializers import UserSerializer
+from .views import (
+    CategoryViewSet,
+    cover_list_schema,
+    CoverViewSet,
+    UserView
+)
+
+
+class AsyncDispatchMixin:
+    """Асинхронный dispatch для представлений DRF.
+
+    Обработчики запросов - корутины. Аутентификация и проверка прав
+    выполняются в потоке, так как бэкенды аутентификации синхронные.
+    """
+
+    @classmethod
+    def as_view(cls, *args, **kwargs):
+        return markcoroutinefunction(super().as_view(*args, **kwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self,
+                    request.method.lower(),
+                    self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if isawaitable(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(
+            request, response, *args, **kwargs)
+        return self.response
+
+
+class AsyncCategoryViewSet(AsyncDispatchMixin, CategoryViewSet):
+
+    async def list(self, request, *args, **kwargs):
+        return Response(await acached_catalogue(
+            'categories', request,
+            lambda: super(CategoryViewSet, self).list(
+                request, *args, **kwargs).data
+        ))
+
+    async def retrieve(self, request, *args, **kwargs):
+        return Response(await acached_catalogue(
+            'category', request,
+            lambda: super(CategoryViewSet, self).retrieve(
+                request, *args, **kwargs).data
+        ))
+
+
+class AsyncCoverViewSet(AsyncDispatchMixin, CoverViewSet):
+
+    @cover_list_schema
+    async def list(self, request, *args, **kwargs):
+        data = await acached_catalogue(
+            'covers', request,
+            lambda: self.search(request) or super(CoverViewSet, self).list(
+                request, *args, **kwargs).data
+        )
+        return Response({
+            **data,
+            'results': await amerge_subscribed_covers(
+                data['results'], request.user)
+        })
+
+    async def retrieve(self, request, *args, **kwargs):
+        data = await acached_catalogue(
+            'cover', request,
+            lambda: super(CoverViewSet, self).retrieve(
+                request, *args, **kwargs).data
+        )
+        return Response({
+            **data,
+            'subscriptions': await amerge_cover_subscriptions(
+                data['subscriptions'], request.user)
+        })
+
+
+class AsyncUserView(AsyncDispatchMixin, UserView):
+
+    @extend_schema(tags=['Users'])
+    async def get(self, request):
+        return Response(UserSerializer(await aget_object_or_404(
+            self.get_queryset(), pk=request.user.pk
+        )).data)
@@ -0,0 +1 @@
+"""Нагрузочные сценарии API и генерация данных для них"""
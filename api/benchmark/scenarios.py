@@ -0,0 +1,207 @@
+import math
+import random
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.tasks import autopayment_shard, cashback_credit
+from subscriptions import MONTH
+from subscriptions.models import (
+    Category,
+    Cover,
+    Subscription,
+    User,
+    UserSubscription
+)
+from .seeder import PREFIX
+
+
+def api_client(user):
+    """Клиент API, авторизованный токеном пользователя"""
+    host = next(
+        (host for host in settings.ALLOWED_HOSTS if host not in ('', '*')),
+        'localhost'
+    )
+    token = RefreshToken.for_user(user).access_token
+    client = APIClient(HTTP_HOST=host)
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+def measure(call):
+    """Время, число SQL-запросов и успешность одного вызова"""
+    with CaptureQueriesContext(connection) as queries:
+        start = perf_counter()
+        succeeded = call()
+        latency = perf_counter() - start
+    return latency, len(queries), succeeded
+
+
+def ok(response):
+    return response.status_code < 400
+
+
+def users():
+    return list(User.objects.filter(username__startswith=PREFIX))
+
+
+def catalogue_browse(requests):
+    """Список категорий, страница обложек и карточка обложки"""
+    seeded_users = users()
+    cover_ids = list(Cover.objects.filter(
+        name__startswith=PREFIX).values_list('id', flat=True))
+    category_ids = list(Category.objects.filter(
+        name__startswith=PREFIX).values_list('id', flat=True))
+    if not seeded_users or not cover_ids or not category_ids:
+        return []
+    client = api_client(random.choice(seeded_users))
+    pages = math.ceil(len(cover_ids) / settings.REST_FRAMEWORK['PAGE_SIZE'])
+    calls = (
+        lambda: ok(client.get(reverse('category-list'))),
+        lambda: ok(client.get(reverse(
+            'category-detail', kwargs={'pk': random.choice(category_ids)}))),
+        lambda: ok(client.get(
+            reverse('cover-list'), {'page': random.randint(1, pages)})),
+        lambda: ok(client.get(reverse(
+            'cover-detail', kwargs={'pk': random.choice(cover_ids)}))),
+    )
+    return [
+        measure(calls[number % len(calls)])
+        for number in range(requests)
+    ]
+
+
+def my(requests):
+    """Профиль пользователя с подписками и расходами за месяц"""
+    clients = [api_client(user) for user in users()[:requests]]
+    if not clients:
+        return []
+    return [
+        measure(lambda client=clients[number % len(clients)]: ok(
+            client.get(reverse('my'))))
+        for number in range(requests)
+    ]
+
+
+def purchase(requests):
+    """Оформление новой подписки"""
+    subscriptions = list(Subscription.objects.filter(
+        name__startswith=PREFIX).values_list('id', 'cover_id'))
+    samples = []
+    for user in users()[:requests]:
+        subscribed = set(UserSubscription.objects.filter(
+            user=user).values_list('subscription__cover_id', flat=True))
+        available = [
+            subscription_id for subscription_id, cover_id in subscriptions
+            if cover_id not in subscribed
+        ]
+        if not available:
+            continue
+        client = api_client(user)
+        data = {
+            'id': random.choice(available),
+            'period': MONTH,
+            'autorenewal': True
+        }
+        samples.append(measure(lambda client=client, data=data: ok(
+            client.post(reverse('subscription-list'), data))))
+    return samples
+
+
+def renewal(requests):
+    """Продление истекшей подписки через PATCH"""
+    samples = []
+    for usersubscription in UserSubscription.objects.filter(
+        user__username__startswith=PREFIX,
+        end_date__lt=timezone.now().date()
+    ).select_related('user')[:requests]:
+        client = api_client(usersubscription.user)
+        path = reverse(
+            'subscription-detail',
+            kwargs={'pk': usersubscription.subscription_id}
+        )
+        samples.append(measure(lambda client=client, path=path: ok(
+            client.patch(path, {'period': MONTH, 'autorenewal': True}))))
+    return samples
+
+
+def receipt(requests):
+    """Скачивание чека подписки в PDF"""
+    samples = []
+    for usersubscription in UserSubscription.objects.filter(
+        user__username__startswith=PREFIX
+    ).select_related('user').order_by('?')[:requests]:
+        client = api_client(usersubscription.user)
+        path = reverse(
+            'subscription-get-reciept',
+            kwargs={'pk': usersubscription.subscription_id}
+        )
+        samples.append(measure(
+            lambda client=client, path=path: ok(client.get(path))))
+    return samples
+
+
+def autopayment(requests):
+    """Автопродление подписок: одно измерение на шард"""
+    shards = settings.AUTOPAYMENT_SHARDS
+    due_date = timezone.now().date().isoformat()
+    return [
+        measure(lambda shard=shard: bool(
+            autopayment_shard(shard, shards, due_date)))
+        for shard in range(shards)
+    ]
+
+
+def cashback(requests):
+    """Начисление кэшбэка на счет"""
+    return [measure(lambda: bool(cashback_credit()))]
+
+
+SCENARIOS = {
+    'catalogue_browse': catalogue_browse,
+    'my': my,
+    'purchase': purchase,
+    'renewal': renewal,
+    'receipt': receipt,
+    'autopayment': autopayment,
+    'cashback_credit': cashback,
+}
+
+
+def percentile(values, percent):
+    """Процентиль методом ближайшего ранга"""
+    values = sorted(values)
+    return values[max(math.ceil(percent / 100 * len(values)) - 1, 0)]
+
+
+def run(name, requests):
+    """Прогон сценария с откатом всех изменений в БД.
+
+    Отчет: задержки p50/p95/p99 в мс, запросов в секунду для одного
+    последовательного клиента и SQL-запросов на запрос.
+    """
+    random.seed(0)
+    with transaction.atomic():
+        samples = SCENARIOS[name](requests)
+        transaction.set_rollback(True)
+    if not samples:
+        return {'scenario': name, 'requests': 0}
+    latencies = [latency for latency, _, _ in samples]
+    return {
+        'scenario': name,
+        'requests': len(samples),
+        'errors': sum(not succeeded for _, _, succeeded in samples),
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'requests_per_second': len(samples) / sum(latencies),
+        'queries_per_request': (
+            sum(queries for _, queries, _ in samples) / len(samples)
+        ),
+    }
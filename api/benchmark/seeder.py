@@ -0,0 +1,159 @@
+import random
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from api.cache import invalidate_catalogue
+from api.functions import add_monthly_expenses
+from subscriptions import DONE, MONTH, UNDONE
+from subscriptions.cache import invalidate_user_subscriptions
+from subscriptions.functions import refresh_cover_summary
+from subscriptions.models import (
+    Category,
+    Cover,
+    Subscription,
+    Transaction,
+    User,
+    UserSubscription
+)
+
+PREFIX = 'benchmark_'
+PHONE_NUMBER = '8{number:09d}'
+BATCH_SIZE = 5000
+ACCOUNT_BALANCE = 100000
+CASHBACK = 10
+
+
+def flush():
+    """Удаление ранее созданных данных нагрузочного теста"""
+    User.objects.filter(username__startswith=PREFIX).delete()
+    Cover.objects.filter(name__startswith=PREFIX).delete()
+    Category.objects.filter(name__startswith=PREFIX).delete()
+
+
+@transaction.atomic
+def seed(
+    users,
+    covers,
+    categories=10,
+    subscriptions_per_cover=3,
+    subscriptions_per_user=3,
+    transactions_per_user=10
+):
+    """Создание каталога, пользователей, их подписок и транзакций.
+
+    У каждого пользователя одна подписка истекла (для продления через
+    PATCH), одна заканчивается сегодня (для автопродления) и одна начата
+    сегодня (для начисления кэшбека).
+    """
+    random.seed(0)
+    today = timezone.now().date()
+    category_objects = Category.objects.bulk_create(
+        Category(name=f'{PREFIX}category_{number}')
+        for number in range(categories)
+    )
+    cover_objects = Cover.objects.bulk_create(
+        (
+            Cover(
+                name=f'{PREFIX}cover_{number}',
+                preview='preview',
+                logo_link='logo_link',
+                service_link='service_link'
+            )
+            for number in range(covers)
+        ),
+        batch_size=BATCH_SIZE
+    )
+    Cover.categories.through.objects.bulk_create(
+        (
+            Cover.categories.through(
+                cover=cover, category=random.choice(category_objects))
+            for cover in cover_objects
+        ),
+        batch_size=BATCH_SIZE
+    )
+    subscriptions = Subscription.objects.bulk_create(
+        (
+            Subscription(
+                name=f'{PREFIX}subscription_{number}',
+                description='description',
+                monthly_price=random.randint(100, 500),
+                semi_annual_price=random.randint(500, 2500),
+                annual_price=random.randint(1000, 5000),
+                cashback_percent=random.randint(1, 15),
+                cover=cover
+            )
+            for cover in cover_objects
+            for number in range(subscriptions_per_cover)
+        ),
+        batch_size=BATCH_SIZE
+    )
+    user_objects = User.objects.bulk_create(
+        (
+            User(
+                username=f'{PREFIX}user_{number}',
+                phone_number=PHONE_NUMBER.format(number=number),
+                account_balance=ACCOUNT_BALANCE,
+                cashback=CASHBACK
+            )
+            for number in range(users)
+        ),
+        batch_size=BATCH_SIZE
+    )
+    end_dates = (
+        today - timedelta(days=1),
+        today,
+    )
+    usersubscriptions = []
+    transactions = []
+    for user in user_objects:
+        subscribed = random.sample(
+            subscriptions, min(subscriptions_per_user, len(subscriptions)))
+        for number, subscription in enumerate(subscribed):
+            end_date = (
+                end_dates[number] if number < len(end_dates)
+                else today + timedelta(days=random.randint(1, 30))
+            )
+            usersubscriptions.append(UserSubscription(
+                user=user,
+                subscription=subscription,
+                start_date=(
+                    today if number == len(end_dates)
+                    else end_date - timedelta(days=30)
+                ),
+                end_date=end_date,
+                price=subscription.monthly_price,
+                period=MONTH,
+                autorenewal=True
+            ))
+        transactions.extend(
+            Transaction(
+                user=user,
+                subscription=random.choice(subscribed),
+                amount=random.randint(100, 500),
+                status=random.choice((DONE, DONE, DONE, UNDONE))
+            )
+            for _ in range(transactions_per_user)
+        )
+    UserSubscription.objects.bulk_create(
+        usersubscriptions, batch_size=BATCH_SIZE)
+    Transaction.objects.bulk_create(transactions, batch_size=BATCH_SIZE)
+    refresh_cover_summary([cover.pk for cover in cover_objects])
+    expenses = defaultdict(int)
+    for payment in transactions:
+        if payment.status == DONE:
+            expenses[payment.user_id] += payment.amount
+    add_monthly_expenses(expenses)
+    transaction.on_commit(invalidate_catalogue)
+    transaction.on_commit(lambda: invalidate_user_subscriptions(
+        *(user.pk for user in user_objects)))
+    return {
+        'users': len(user_objects),
+        'categories': len(category_objects),
+        'covers': len(cover_objects),
+        'subscriptions': len(subscriptions),
+        'usersubscriptions': len(usersubscriptions),
+        'transactions': len(transactions)
+    }
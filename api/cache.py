@@ -0,0 +1,123 @@
+import hashlib
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.utils import timezone
+
+from .constants import (
+    CATALOGUE_CACHE_KEY,
+    CATALOGUE_CACHE_TIMEOUT,
+    CATALOGUE_VERSION_KEY
+)
+from subscriptions.cache import (
+    aactive_cover_ids,
+    active_cover_ids,
+    auser_subscriptions,
+    user_subscriptions
+)
+
+
+def catalogue_version():
+    """Текущая версия кэша каталога"""
+    return cache.get_or_set(CATALOGUE_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+async def acatalogue_version():
+    """Асинхронный вариант catalogue_version"""
+    return await cache.aget_or_set(
+        CATALOGUE_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def invalidate_catalogue():
+    """Сброс кэша каталога сменой версии"""
+    cache.set(CATALOGUE_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def catalogue_key(version, name, identity):
+    return CATALOGUE_CACHE_KEY.format(
+        version=version,
+        name=name,
+        digest=hashlib.md5(identity.encode()).hexdigest()
+    )
+
+
+def cached_catalogue_value(name, identity, build):
+    """Значение из кэша каталога по произвольной строке-идентификатору"""
+    key = catalogue_key(catalogue_version(), name, identity)
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.set(key, value, CATALOGUE_CACHE_TIMEOUT)
+    return value
+
+
+async def acached_catalogue_value(name, identity, build):
+    """Асинхронный вариант cached_catalogue_value.
+
+    Синхронная build выполняется в потоке только при промахе кэша.
+    """
+    key = catalogue_key(await acatalogue_version(), name, identity)
+    value = await cache.aget(key)
+    if value is None:
+        value = await sync_to_async(build)()
+        await cache.aset(key, value, CATALOGUE_CACHE_TIMEOUT)
+    return value
+
+
+def cached_catalogue(name, request, build):
+    """Независимая от пользователя часть ответа каталога из кэша"""
+    return cached_catalogue_value(
+        name, request.build_absolute_uri(), build)
+
+
+async def acached_catalogue(name, request, build):
+    """Асинхронный вариант cached_catalogue"""
+    return await acached_catalogue_value(
+        name, request.build_absolute_uri(), build)
+
+
+def subscribed_covers(covers, cover_ids):
+    return [
+        {**cover, 'is_subscribed': cover['id'] in cover_ids}
+        for cover in covers
+    ]
+
+
+def merge_subscribed_covers(covers, user):
+    """Добавление признака подписки в список обложек"""
+    return subscribed_covers(covers, active_cover_ids(user.id))
+
+
+async def amerge_subscribed_covers(covers, user):
+    """Асинхронный вариант merge_subscribed_covers"""
+    return subscribed_covers(covers, await aactive_cover_ids(user.id))
+
+
+def cover_subscriptions(subscriptions, subscribed):
+    end_dates = {
+        subscription_id: end_date
+        for subscription_id, (_, end_date)
+        in subscribed.items()
+    }
+    today = timezone.now().date()
+    merged = []
+    for subscription in subscriptions:
+        end_date = end_dates.get(subscription['id'])
+        merged.append({
+            **subscription,
+            'is_subscribed': end_date is not None and end_date >= today,
+            'end_date': str(end_date) if end_date else None
+        })
+    return merged
+
+
+def merge_cover_subscriptions(subscriptions, user):
+    """Добавление данных пользователя в тарифы обложки"""
+    return cover_subscriptions(subscriptions, user_subscriptions(user.id))
+
+
+async def amerge_cover_subscriptions(subscriptions, user):
+    """Асинхронный вариант merge_cover_subscriptions"""
+    return cover_subscriptions(
+        subscriptions, await auser_subscriptions(user.id))
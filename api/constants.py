@@ -26,12 +26,101 @@ PAY2U_PHONE_NUMBER = '+70123456789'
 """Сообщения об ошибках"""
 SUBSCRIPTION_EXIST_ERROR = {'error': 'Вы уже подписаные на один из тарифов'}
 INSUFFICIENT_FUNDS = {'error': 'Недостаточно средств на счете'}
+RENEWAL_CHARGE_ERROR = (
+    'Balances changed during renewal: {charged} of {expected} users charged'
+)
 NO_DATA_TRANSFERED = {'error': 'Данные не переданы'}
 
-"""Набор символов для генерации промокода"""
+"""Атрибут с подписками пользователя, загруженными через prefetch"""
+USERSUBSCRIPTIONS_ATTR = 'user_usersubscriptions'
+
+"""Кэш каталога"""
+CATALOGUE_CACHE_KEY = 'catalogue:{version}:{name}:{digest}'
+CATALOGUE_VERSION_KEY = 'catalogue:version'
+CATALOGUE_CACHE_TIMEOUT = 60 * 60 * 24
+
+"""Размеры пакетов для задач планировщика"""
+AUTOPAYMENT_CHUNK_SIZE = 1000
+CASHBACK_CREDIT_CHUNK_SIZE = 5000
+SMS_OUTBOX_BATCH_SIZE = 500
+
+"""Очередь смс"""
+SMS_OUTBOX_LOCK_KEY = 'sms_outbox:lock'
+SMS_OUTBOX_LOCK_TIMEOUT = 5 * 60
+SMS_OUTBOX_RUN_TIME = 60
+SMS_OUTBOX_CLAIM_TIMEOUT = 10 * 60
+
+"""Чек в PDF"""
+RECEIPT_CACHE = 'receipts'
+RECEIPT_FONT = 'timesnewromanpsmt'
+RECEIPT_FONT_FILE = 'timesnewromanpsmt.ttf'
+RECEIPT_FILENAME = 'Reciept#{id}.pdf'
+RECEIPT_MEDIA_DIR = 'receipts'
+RECEIPT_MEDIA_PATH = RECEIPT_MEDIA_DIR + '/{digest}.pdf'
+RECEIPT_TASK_KEY = 'receipt_task:{path}'
+RECEIPT_TASK_TIMEOUT = 60
+RECEIPT_HEADER = (
+    (16, 250, 800, 'PAY2U'),
+    (16, 200, 750, 'Подписка оформлена'),
+)
+RECEIPT_LINES = (
+    'Номер телефона: {phone_number}',
+    'Название: {name}',
+    'Действует до: {end_date}',
+    'Цена: {price}',
+    'Промокод: {promocode}',
+)
+RECEIPT_LINES_FONT_SIZE = 14
+RECEIPT_LINES_X = 75
+RECEIPT_LINES_TOP = 725
+RECEIPT_LINES_STEP = 25
+
+"""Набор символов и число раундов для генерации промокода"""
 PROMOCODE_SYMBOLS = string.ascii_uppercase + string.digits
+PROMOCODE_FEISTEL_ROUNDS = 4
 
 """Сообщения о выполнении задач celery"""
-AUTOPAYMENT_REPORT = 'Prolongations for {count} clients done'
+AUTOPAYMENT_DISPATCH_REPORT = 'Prolongations dispatched to {shards} shards'
+AUTOPAYMENT_REPORT = (
+    'Prolongations for {count} clients done, {failed} failed'
+)
+RECEIPTS_BENCHMARK_REPORT = '{count} receipts in {seconds:.2f}s: {rate:.1f}/s'
+SEARCH_BENCHMARK_REPORT = (
+    '{queries} searches over {covers} covers: {average:.2f} ms on average'
+)
+ASYNC_BENCHMARK_REPORT = (
+    '{mode:>5} {name}: {requests} requests by {concurrency} clients, '
+    '{rate:.1f} req/s, p95 {p95:.2f} ms'
+)
+ASYNC_BENCHMARK_EMPTY_ERROR = (
+    'No users or covers to run on, seed_benchmark first'
+)
+SEED_BENCHMARK_REPORT = (
+    'Seeded {users} users, {categories} categories, {covers} covers, '
+    '{subscriptions} subscriptions, {usersubscriptions} user subscriptions, '
+    '{transactions} transactions'
+)
+BENCHMARK_REPORT = (
+    '{scenario}: {requests} requests, {errors} errors, '
+    'p50 {p50_ms:.2f} ms, p95 {p95_ms:.2f} ms, p99 {p99_ms:.2f} ms, '
+    '{requests_per_second:.1f} req/s, '
+    '{queries_per_request:.1f} queries/request'
+)
+BENCHMARK_EMPTY_REPORT = '{scenario}: no data to run on, seed_benchmark first'
+BENCHMARK_SAVED_REPORT = 'Results saved to {path}'
 CASHBACK_CREDIT_REPORT = 'Cashback crediting for {count} clients done'
+RECEIPTS_REPORT = 'Receipts for {count} subscriptions rendered'
+RECEIPTS_CLEANUP_REPORT = '{count} expired receipts removed'
 SEND_SMS_REPORT = 'Sent to {country_code}{recipient}'
+SMS_OUTBOX_REPORT = '{sent} sms sent, {failed} failed'
+SMS_OUTBOX_BUSY_REPORT = 'SMS outbox is being sent by another worker'
+
+"""Профилирование запросов"""
+PROFILING_LOGGER = 'api.profiling'
+PROFILING_SQL_LENGTH = 500
+PROFILE_FILENAME = '{time:%Y%m%d-%H%M%S-%f}-{view}.prof'
+SERVER_TIMING = (
+    'total;dur={total:.2f}, '
+    'db;dur={db:.2f};desc="{queries} queries", '
+    'serializer;dur={serializer:.2f}'
+)
@@ -1,16 +1,29 @@
 from django_filters.rest_framework import FilterSet, filters
 
-from subscriptions.models import Category, Cover
+from subscriptions.models import Category, Cover, Transaction
 
 
 class CoverFilter(FilterSet):
     name = filters.CharFilter(lookup_expr='istartswith')
     categories = filters.ModelMultipleChoiceFilter(
-        field_name='categories__name',
         to_field_name='name',
-        queryset=Category.objects.all()
+        queryset=Category.objects.all(),
+        method='filter_categories'
     )
 
     class Meta:
         model = Cover
         fields = ('name',)
+
+    def filter_categories(self, queryset, name, value):
+        """Фильтрует по id найденных категорий, без JOIN таблицы категорий."""
+        if not value:
+            return queryset
+        return queryset.filter(categories__in=value).distinct()
+
+
+class TransactionFilter(FilterSet):
+
+    class Meta:
+        model = Transaction
+        fields = ('status', 'subscription')
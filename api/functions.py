@@ -1,79 +1,255 @@
-import random
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from functools import partial
+import hashlib
 
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import (
+    Case,
+    DecimalField,
+    Exists,
+    F,
+    OuterRef,
+    Prefetch,
+    Value,
+    When
+)
 from django.http import HttpResponse
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
-
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 
-from .constants import PROMOCODE_SYMBOLS
+from .constants import (
+    ADDITION_SUBSCRIPTION_DAYS,
+    AUTOPAYMENT_CHUNK_SIZE,
+    CASHBACK_CREDIT_CHUNK_SIZE,
+    PROMOCODE_FEISTEL_ROUNDS,
+    PROMOCODE_SYMBOLS,
+    RECEIPT_FILENAME,
+    RENEWAL_CHARGE_ERROR,
+    USERSUBSCRIPTIONS_ATTR
+)
+from .receipts import cached_receipt, receipt_etag
 from subscriptions import (
     DONE,
     PROMOCODE_LENGHT,
     UNDONE
 )
+from subscriptions.cache import invalidate_user_subscriptions
 from subscriptions.models import (
+    MonthlyExpense,
+    PromocodeSequence,
     Transaction,
+    User,
     UserSubscription,
 )
 
 
+def feistel_permutation(number):
+    """Перестановка 64-битных чисел сетью Фейстеля с секретным ключом"""
+    key = hashlib.sha256(settings.PROMOCODE_SECRET.encode()).digest()
+    left, right = number >> 32, number & 0xFFFFFFFF
+    for round_number in range(PROMOCODE_FEISTEL_ROUNDS):
+        round_value = int.from_bytes(hashlib.blake2b(
+            right.to_bytes(4, 'big') + bytes((round_number,)),
+            digest_size=4,
+            key=key
+        ).digest(), 'big')
+        left, right = right, left ^ round_value
+    return (left << 32) | right
+
+
 def promocode_generator():
-    """Генератор промокода"""
-    while (True):
-        promocode = ''.join(random.choices(PROMOCODE_SYMBOLS,
-                                           k=PROMOCODE_LENGHT))
-        if not UserSubscription.objects.filter(promocode=promocode).exists():
-            break
-    return promocode
-
-
-def pdf_receipt_generator(id, phone_number, name, end_date, promocode, price):
-    """Генератор чека в PDF"""
-    drawing_data = (
-        f'Номер телефона: {phone_number}',
-        f'Название: {name}',
-        f'Действует до: {end_date}',
-        f'Цена: {price}',
-        f'Промокод: {promocode}'
+    """Генератор промокода: перестановка очередного номера последовательности
+
+    Разные номера дают разные промокоды, поэтому проверка существующих
+    промокодов не нужна.
+    """
+    number = feistel_permutation(PromocodeSequence.objects.create().pk)
+    symbols = []
+    for _ in range(PROMOCODE_LENGHT):
+        number, index = divmod(number, len(PROMOCODE_SYMBOLS))
+        symbols.append(PROMOCODE_SYMBOLS[index])
+    return ''.join(symbols)
+
+
+def usersubscriptions_prefetch(user):
+    """Предвыборка подписок пользователя для сериализаторов подписок"""
+    return Prefetch(
+        'usersubscriptions',
+        queryset=UserSubscription.objects.filter(user_id=user.id),
+        to_attr=USERSUBSCRIPTIONS_ATTR
     )
-    pdfmetrics.registerFont(
-        TTFont('timesnewromanpsmt', 'timesnewromanpsmt.ttf',))
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = ('attachment; '
-                                       f'filename="Reciept#{id}.pdf"')
-    page = canvas.Canvas(response)
-    page.setFont('timesnewromanpsmt', size=16)
-    page.drawString(250, 800, 'PAY2U')
-    page.drawString(200, 750, 'Подписка оформлена')
-    page.setFont('timesnewromanpsmt', size=14)
-    height = 725
-    for i in drawing_data:
-        page.drawString(75, height, i)
-        height -= 25
-    page.showPage()
-    page.save()
+
+
+def pdf_receipt_generator(request, id, **fields):
+    """Генератор чека в PDF с поддержкой условных запросов"""
+    etag = receipt_etag(id=id, **fields)
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        return response
+    pdf, rendered_at = cached_receipt(etag, **fields)
+    response = HttpResponse(pdf, content_type='application/pdf')
+    response['Content-Disposition'] = (
+        f'attachment; filename="{RECEIPT_FILENAME.format(id=id)}"')
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(rendered_at.timestamp())
     return response
 
 
+def cashback_amount(amount, cashback_percent):
+    """Размер кэшбэка с платежа"""
+    return (amount * cashback_percent / 100).quantize(Decimal('0.01'))
+
+
 def payment(user, subscription, amount):
-    """Функция проведения платежа"""
-    if user.account_balance < amount:
-        status = UNDONE
-    else:
-        status = DONE
-        user.account_balance -= amount
-        user.save()
-    Transaction.objects.create(
-        user=user,
-        subscription=subscription,
-        amount=amount,
-        status=status
+    """Функция проведения платежа с начислением кэшбэка
+
+    Баланс проверяется и списывается одним условным UPDATE, поэтому
+    одновременные покупки не могут увести счет в минус.
+    """
+    with transaction.atomic():
+        paid = User.objects.filter(
+            pk=user.pk,
+            account_balance__gte=amount
+        ).update(
+            account_balance=F('account_balance') - amount,
+            cashback=F('cashback') + cashback_amount(
+                amount, subscription.cashback_percent)
+        )
+        Transaction.objects.create(
+            user=user,
+            subscription=subscription,
+            amount=amount,
+            status=DONE if paid else UNDONE
+        )
+        if paid:
+            add_monthly_expenses({user.pk: amount})
+    return bool(paid)
+
+
+def amounts_by_user(amounts, lookup='pk'):
+    """Выражение CASE с суммой для каждого пользователя"""
+    return Case(
+        *(When(**{lookup: user_id}, then=Value(amount))
+          for user_id, amount in amounts.items()),
+        output_field=DecimalField()
+    )
+
+
+def add_monthly_expenses(amounts):
+    """Прибавление платежей к расходам пользователей за текущий месяц"""
+    month = timezone.now().date().replace(day=1)
+    MonthlyExpense.objects.bulk_create(
+        (MonthlyExpense(user_id=user_id, month=month) for user_id in amounts),
+        ignore_conflicts=True
     )
-    return True if status == DONE else False
+    MonthlyExpense.objects.filter(
+        month=month,
+        user_id__in=amounts
+    ).update(amount=F('amount') + amounts_by_user(amounts, 'user_id'))
+
+
+def renew_chunk(usersubscriptions, on_renewed=None):
+    """Продление пакета подписок в одной транзакции
+
+    Если списание прошло не у всех пользователей пакета, исключение
+    откатывает весь пакет.
+    """
+    balances = dict(User.objects.select_for_update().filter(
+        pk__in={usersubscription.user_id
+                for usersubscription in usersubscriptions}
+    ).values_list('pk', 'account_balance'))
+    debits = defaultdict(Decimal)
+    cashbacks = defaultdict(Decimal)
+    transactions = []
+    renewed = []
+    for usersubscription in usersubscriptions:
+        price = usersubscription.price
+        if balances[usersubscription.user_id] >= price:
+            balances[usersubscription.user_id] -= price
+            debits[usersubscription.user_id] += price
+            cashbacks[usersubscription.user_id] += cashback_amount(
+                price, usersubscription.subscription.cashback_percent)
+            usersubscription.end_date += timedelta(
+                days=ADDITION_SUBSCRIPTION_DAYS[usersubscription.period])
+            renewed.append(usersubscription)
+            status = DONE
+        else:
+            status = UNDONE
+        transactions.append(Transaction(
+            user_id=usersubscription.user_id,
+            subscription_id=usersubscription.subscription_id,
+            amount=price,
+            status=status
+        ))
+    if debits:
+        debit = amounts_by_user(debits)
+        charged = User.objects.filter(
+            pk__in=debits,
+            account_balance__gte=debit
+        ).update(
+            account_balance=F('account_balance') - debit,
+            cashback=F('cashback') + amounts_by_user(cashbacks)
+        )
+        if charged != len(debits):
+            raise DatabaseError(RENEWAL_CHARGE_ERROR.format(
+                charged=charged, expected=len(debits)))
+        UserSubscription.objects.bulk_update(renewed, ('end_date',))
+        add_monthly_expenses(debits)
+        transaction.on_commit(
+            partial(invalidate_user_subscriptions, *debits))
+        if on_renewed is not None:
+            transaction.on_commit(partial(on_renewed, [
+                usersubscription.pk for usersubscription in renewed
+            ]))
+    Transaction.objects.bulk_create(transactions)
+    return len(renewed), len(usersubscriptions) - len(renewed)
+
+
+def renew_subscriptions(
+    usersubscriptions,
+    chunk_size=AUTOPAYMENT_CHUNK_SIZE,
+    on_renewed=None
+):
+    """Пакетное продление подписок, возвращает число успешных и неудачных
+
+    on_renewed вызывается после фиксации каждого пакета со списком id
+    продленных подписок.
+    """
+    done = failed = last_id = 0
+    while True:
+        with transaction.atomic():
+            chunk = list(usersubscriptions.filter(
+                pk__gt=last_id
+            ).select_related('subscription').order_by('pk')[:chunk_size])
+            if not chunk:
+                return done, failed
+            last_id = chunk[-1].pk
+            chunk_done, chunk_failed = renew_chunk(chunk, on_renewed)
+        done += chunk_done
+        failed += chunk_failed
 
 
-def cashback_calculation(user, amount, cashback_percent):
-    """Фнукция начисления кэшбека"""
-    user.cashback += amount * (cashback_percent / 100)
-    user.save()
+def credit_cashback(credit_date, chunk_size=CASHBACK_CREDIT_CHUNK_SIZE):
+    """Перевод кэшбэка на счет пользователей с подпиской от указанной даты"""
+    users = User.objects.filter(
+        Exists(UserSubscription.objects.filter(
+            user=OuterRef('pk'),
+            start_date=credit_date
+        )),
+        cashback__gt=0
+    ).order_by('pk')
+    count = last_id = 0
+    while True:
+        chunk = list(users.filter(pk__gt=last_id).values_list(
+            'pk', flat=True)[:chunk_size])
+        if not chunk:
+            return count
+        last_id = chunk[-1]
+        count += User.objects.filter(pk__in=chunk).update(
+            account_balance=F('account_balance') + F('cashback'),
+            cashback=0
+        )
@@ -0,0 +1,60 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from api.benchmark.scenarios import run, SCENARIOS
+from api.constants import (
+    BENCHMARK_EMPTY_REPORT,
+    BENCHMARK_REPORT,
+    BENCHMARK_SAVED_REPORT
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет нагрузочные сценарии на данных seed_benchmark и '
+        'сохраняет результаты в JSON для сравнения между запусками'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            choices=SCENARIOS,
+            help='Сценарий; можно указать несколько раз, по умолчанию все'
+        )
+        parser.add_argument(
+            '--output',
+            default=None,
+            help=(
+                'Файл результатов, '
+                'по умолчанию benchmark-results/<время>.json'
+            )
+        )
+
+    def handle(self, *args, **options):
+        started = timezone.now()
+        results = []
+        for name in options['scenario'] or SCENARIOS:
+            result = run(name, options['requests'])
+            results.append(result)
+            self.stdout.write(
+                (BENCHMARK_REPORT if result['requests']
+                 else BENCHMARK_EMPTY_REPORT).format(**result)
+            )
+        output = Path(options['output'] or settings.BASE_DIR.joinpath(
+            'benchmark-results', f'{started:%Y%m%d-%H%M%S}.json'))
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps({
+            'started': started.isoformat(),
+            'database': connection.vendor,
+            'requests': options['requests'],
+            'results': results
+        }, indent=2))
+        self.stdout.write(self.style.SUCCESS(
+            BENCHMARK_SAVED_REPORT.format(path=output)))
@@ -0,0 +1,156 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from statistics import quantiles
+from time import perf_counter
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.urls import reverse
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.async_views import (
+    AsyncCategoryViewSet,
+    AsyncCoverViewSet,
+    AsyncUserView
+)
+from api.constants import ASYNC_BENCHMARK_EMPTY_ERROR, ASYNC_BENCHMARK_REPORT
+from api.views import CategoryViewSet, CoverViewSet, UserView
+from subscriptions.models import Cover
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность синхронных (потоки) и '
+        'асинхронных (одна петля событий) представлений каталога и /my/ '
+        'при одновременных клиентах на данных текущей БД'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--phone-number', default=None)
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options['phone_number']:
+            users = users.filter(phone_number=options['phone_number'])
+        user = users.first()
+        cover_id = Cover.objects.values_list('id', flat=True).first()
+        if user is None or cover_id is None:
+            raise CommandError(ASYNC_BENCHMARK_EMPTY_ERROR)
+        token = str(RefreshToken.for_user(user).access_token)
+        factory = APIRequestFactory()
+        for name, path, sync_view, async_view, kwargs in (
+            (
+                'categories',
+                reverse('category-list'),
+                CategoryViewSet.as_view({'get': 'list'}),
+                AsyncCategoryViewSet.as_view({'get': 'list'}),
+                {}
+            ),
+            (
+                'covers',
+                reverse('cover-list'),
+                CoverViewSet.as_view({'get': 'list'}),
+                AsyncCoverViewSet.as_view({'get': 'list'}),
+                {}
+            ),
+            (
+                'cover',
+                reverse('cover-detail', kwargs={'pk': cover_id}),
+                CoverViewSet.as_view({'get': 'retrieve'}),
+                AsyncCoverViewSet.as_view({'get': 'retrieve'}),
+                {'pk': cover_id}
+            ),
+            (
+                'my',
+                reverse('my'),
+                UserView.as_view(),
+                AsyncUserView.as_view(),
+                {}
+            ),
+        ):
+            def request(path=path):
+                return factory.get(
+                    path,
+                    HTTP_AUTHORIZATION=f'Bearer {token}',
+                    HTTP_HOST=settings.ALLOWED_HOSTS[0]
+                )
+
+            for mode, run in (
+                ('sync', self.run_sync),
+                ('async', self.run_async),
+            ):
+                latencies, seconds = run(
+                    sync_view if mode == 'sync' else async_view,
+                    request,
+                    kwargs,
+                    options['requests'],
+                    options['concurrency']
+                )
+                self.stdout.write(ASYNC_BENCHMARK_REPORT.format(
+                    mode=mode,
+                    name=name,
+                    requests=len(latencies),
+                    concurrency=options['concurrency'],
+                    rate=len(latencies) / seconds,
+                    p95=quantiles(latencies, n=100)[94] * 1000
+                ))
+
+    def run_sync(self, view, request, kwargs, requests, concurrency):
+        """Запросы в пуле потоков, как у gunicorn с потоковыми воркерами"""
+        def client(count):
+            latencies = []
+            try:
+                for _ in range(count):
+                    start = perf_counter()
+                    view(request(), **kwargs).render()
+                    latencies.append(perf_counter() - start)
+            finally:
+                connections.close_all()
+            return latencies
+
+        view(request(), **kwargs).render()
+        start = perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            results = list(executor.map(
+                client, self.shares(requests, concurrency)))
+        return sum(results, []), perf_counter() - start
+
+    def run_async(self, view, request, kwargs, requests, concurrency):
+        """Запросы корутинами в одной петле событий, как у ASGI-воркера"""
+        async def call():
+            response = await view(request(), **kwargs)
+            await sync_to_async(response.render)()
+
+        async def client(count):
+            latencies = []
+            for _ in range(count):
+                start = perf_counter()
+                await call()
+                latencies.append(perf_counter() - start)
+            return latencies
+
+        async def clients():
+            await call()
+            start = perf_counter()
+            results = await asyncio.gather(*(
+                client(count)
+                for count in self.shares(requests, concurrency)
+            ))
+            return sum(results, []), perf_counter() - start
+
+        return asyncio.run(clients())
+
+    @staticmethod
+    def shares(requests, concurrency):
+        return [
+            requests // concurrency + (number < requests % concurrency)
+            for number in range(concurrency)
+        ]
@@ -0,0 +1,72 @@
+import random
+import string
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.constants import SEARCH_BENCHMARK_REPORT
+from api.filters import CoverFilter
+from subscriptions.models import Category, Cover
+
+CATEGORIES_AMOUNT = 20
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет скорость поиска обложек по началу названия и категориям '
+        'на временно созданном каталоге (данные откатываются)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--covers', type=int, default=100000)
+        parser.add_argument('--queries', type=int, default=200)
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        random.seed(0)
+        categories = Category.objects.bulk_create(
+            Category(name=f'benchmark_category_{number}')
+            for number in range(CATEGORIES_AMOUNT)
+        )
+        covers = Cover.objects.bulk_create(
+            (
+                Cover(
+                    name=''.join(random.choices(string.ascii_letters, k=12)),
+                    preview='preview',
+                    logo_link='logo_link',
+                    service_link='service_link',
+                )
+                for _ in range(options['covers'])
+            ),
+            batch_size=BATCH_SIZE
+        )
+        Cover.categories.through.objects.bulk_create(
+            (
+                Cover.categories.through(
+                    cover=cover, category=random.choice(categories))
+                for cover in covers
+            ),
+            batch_size=BATCH_SIZE
+        )
+        searches = [
+            {
+                'name': ''.join(random.choices(
+                    string.ascii_letters, k=random.randint(1, 3))),
+                'categories': [random.choice(categories).name],
+            }
+            for _ in range(options['queries'])
+        ]
+        self.stdout.write(CoverFilter(
+            searches[0], queryset=Cover.objects.all()).qs.explain())
+        start = perf_counter()
+        for search in searches:
+            list(CoverFilter(
+                search, queryset=Cover.objects.all()).qs[:10])
+        self.stdout.write(SEARCH_BENCHMARK_REPORT.format(
+            queries=len(searches),
+            covers=len(covers),
+            average=(perf_counter() - start) / len(searches) * 1000
+        ))
+        transaction.set_rollback(True)
@@ -0,0 +1,29 @@
+from datetime import date
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from api.constants import RECEIPTS_BENCHMARK_REPORT
+from api.receipts import render_receipt
+
+
+class Command(BaseCommand):
+    help = 'Измеряет скорость генерации чеков в PDF'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count = options['count']
+        start = perf_counter()
+        for number in range(count):
+            render_receipt(
+                phone_number='9001234567',
+                name=f'subscription_{number}',
+                end_date=date.today(),
+                promocode='PROMOCODE1234',
+                price='199.00'
+            )
+        seconds = perf_counter() - start
+        self.stdout.write(RECEIPTS_BENCHMARK_REPORT.format(
+            count=count, seconds=seconds, rate=count / seconds))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from api.benchmark.seeder import flush, seed
+from api.constants import SEED_BENCHMARK_REPORT
+
+
+class Command(BaseCommand):
+    help = (
+        'Создает данные для нагрузочного теста: каталог, пользователей, '
+        'их подписки и транзакции'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--covers', type=int, default=100)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--subscriptions-per-cover', type=int, default=3)
+        parser.add_argument('--subscriptions-per-user', type=int, default=3)
+        parser.add_argument('--transactions-per-user', type=int, default=10)
+        parser.add_argument(
+            '--flush',
+            action='store_true',
+            help='Удалить ранее созданные данные нагрузочного теста'
+        )
+
+    def handle(self, *args, **options):
+        if options['flush']:
+            flush()
+        counts = seed(
+            users=options['users'],
+            covers=options['covers'],
+            categories=options['categories'],
+            subscriptions_per_cover=options['subscriptions_per_cover'],
+            subscriptions_per_user=options['subscriptions_per_user'],
+            transactions_per_user=options['transactions_per_user']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            SEED_BENCHMARK_REPORT.format(**counts)))
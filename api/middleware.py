@@ -0,0 +1,204 @@
+import cProfile
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends.utils import CursorWrapper
+from django.utils import timezone
+from rest_framework import serializers
+
+from .constants import (
+    PROFILE_FILENAME,
+    PROFILING_LOGGER,
+    PROFILING_SQL_LENGTH,
+    SERVER_TIMING
+)
+
+logger = logging.getLogger(PROFILING_LOGGER)
+current_profile = ContextVar('current_profile', default=None)
+profiler_lock = threading.Lock()
+
+
+class RequestProfile:
+    """Замеры одного запроса: SQL, сериализация и cProfile"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0
+        self.slowest_time = 0
+        self.slowest_sql = ''
+        self.serializer_time = 0
+        self.serializer_depth = 0
+        self.total_time = 0
+        self.profiler = None
+
+    def record_query(self, sql, elapsed):
+        self.queries += 1
+        self.db_time += elapsed
+        if elapsed > self.slowest_time:
+            self.slowest_time = elapsed
+            self.slowest_sql = sql
+
+
+def timed_execute(execute):
+    """Выполнение SQL с учетом времени в профиле запроса.
+
+    Курсор оборачивается на уровне класса: при ASGI ORM работает в потоках
+    sync_to_async со своими соединениями, профиль туда попадает через
+    ContextVar.
+    """
+    @wraps(execute)
+    def wrapper(cursor, sql, *args, **kwargs):
+        profile = current_profile.get()
+        if profile is None:
+            return execute(cursor, sql, *args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return execute(cursor, sql, *args, **kwargs)
+        finally:
+            profile.record_query(sql, time.perf_counter() - start)
+
+    wrapper.profiled = True
+    return wrapper
+
+
+def instrument_cursors():
+    for name in ('execute', 'executemany'):
+        execute = getattr(CursorWrapper, name)
+        if not getattr(execute, 'profiled', False):
+            setattr(CursorWrapper, name, timed_execute(execute))
+
+
+def timed_data(data):
+    """Свойство data сериализатора с учетом времени в профиле запроса.
+
+    Вложенные сериализаторы не учитываются повторно.
+    """
+    def wrapper(serializer):
+        profile = current_profile.get()
+        if profile is None or profile.serializer_depth:
+            return data.fget(serializer)
+        profile.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return data.fget(serializer)
+        finally:
+            profile.serializer_time += time.perf_counter() - start
+            profile.serializer_depth -= 1
+
+    wrapper.profiled = True
+    return property(wrapper)
+
+
+def instrument_serializers():
+    for serializer_class in (
+        serializers.Serializer,
+        serializers.ListSerializer
+    ):
+        if not getattr(serializer_class.data.fget, 'profiled', False):
+            serializer_class.data = timed_data(serializer_class.data)
+
+
+def sampled_profiler():
+    """cProfile для доли запросов PROFILING_SAMPLE_RATE, по одному за раз"""
+    if (
+        random.random() >= settings.PROFILING_SAMPLE_RATE
+        or not profiler_lock.acquire(blocking=False)
+    ):
+        return None
+    return cProfile.Profile()
+
+
+class ProfilingMiddleware:
+    """Профилирование запросов, включается настройкой PROFILING.
+
+    Время ответа, число и время SQL-запросов, самый медленный запрос
+    и время сериализации отдаются в заголовке Server-Timing и пишутся
+    в лог api.profiling одной JSON-строкой. Медленные запросы
+    (PROFILING_SLOW_MS) из выборки PROFILING_SAMPLE_RATE сохраняются
+    как cProfile в PROFILING_DIR.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        instrument_cursors()
+        instrument_serializers()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with self.measure() as profile:
+            response = self.get_response(request)
+        return self.finish(request, response, profile)
+
+    async def __acall__(self, request):
+        with self.measure() as profile:
+            response = await self.get_response(request)
+        return self.finish(request, response, profile)
+
+    @contextmanager
+    def measure(self):
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        profile.profiler = sampled_profiler()
+        start = time.perf_counter()
+        if profile.profiler is not None:
+            profile.profiler.enable()
+        try:
+            yield profile
+        finally:
+            profile.total_time = time.perf_counter() - start
+            if profile.profiler is not None:
+                profile.profiler.disable()
+                profiler_lock.release()
+            current_profile.reset(token)
+
+    def finish(self, request, response, profile):
+        response.headers['Server-Timing'] = SERVER_TIMING.format(
+            total=profile.total_time * 1000,
+            db=profile.db_time * 1000,
+            queries=profile.queries,
+            serializer=profile.serializer_time * 1000
+        )
+        match = request.resolver_match
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(profile.total_time * 1000, 2),
+            'db_queries': profile.queries,
+            'db_ms': round(profile.db_time * 1000, 2),
+            'slowest_query_ms': round(profile.slowest_time * 1000, 2),
+            'slowest_query': profile.slowest_sql[:PROFILING_SQL_LENGTH],
+            'serializer_ms': round(profile.serializer_time * 1000, 2),
+        }
+        slow = profile.total_time * 1000 >= settings.PROFILING_SLOW_MS
+        if slow and profile.profiler is not None:
+            os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+            record['profile'] = os.path.join(
+                settings.PROFILING_DIR,
+                PROFILE_FILENAME.format(
+                    time=timezone.now(),
+                    view=re.sub(r'\W', '_', record['view'] or 'unresolved')
+                )
+            )
+            profile.profiler.dump_stats(record['profile'])
+        (logger.warning if slow else logger.info)(json.dumps(record))
+        return response
@@ -0,0 +1,152 @@
+import hashlib
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Value, When
+from django.utils import timezone
+from sms import Message, get_connection
+
+from .constants import (
+    SMS_OUTBOX_BATCH_SIZE,
+    SMS_OUTBOX_CLAIM_TIMEOUT,
+    SMS_OUTBOX_RUN_TIME
+)
+from subscriptions import SMS_FAILED, SMS_PENDING, SMS_SENDING, SMS_SENT
+from subscriptions.models import SmsMessage
+
+
+class TokenBucket:
+    """Ограничение темпа отправки: rate токенов в секунду, не более burst"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self):
+        """Ожидание свободного токена"""
+        while True:
+            now = time.monotonic()
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            time.sleep((1 - self.tokens) / self.rate)
+
+
+def enqueue_sms(text, sender, recipient, country_code='+7'):
+    """Постановка смс в очередь; повтор того же смс игнорируется.
+
+    Запись идет в транзакции вызывающего кода: смс уйдет, только если
+    покупка сохранена. Брокер при этом не вызывается.
+    """
+    recipient = country_code + recipient
+    SmsMessage.objects.bulk_create(
+        [SmsMessage(
+            key=hashlib.sha256(
+                '\n'.join((sender, recipient, text)).encode()).hexdigest(),
+            text=text,
+            sender=sender,
+            recipient=recipient
+        )],
+        ignore_conflicts=True
+    )
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка перед повторной отправкой"""
+    return timedelta(seconds=settings.SMS_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def release_stale_sms():
+    """Возврат в очередь смс, взятых упавшим воркером.
+
+    Смс, исчерпавшие попытки, помечаются неотправленными.
+    """
+    SmsMessage.objects.filter(
+        status=SMS_SENDING,
+        claimed__lt=timezone.now() - timedelta(
+            seconds=SMS_OUTBOX_CLAIM_TIMEOUT)
+    ).update(status=Case(
+        When(attempts__gte=settings.SMS_MAX_ATTEMPTS, then=Value(SMS_FAILED)),
+        default=Value(SMS_PENDING)
+    ))
+
+
+def claim_sms(batch_size):
+    """Захват пачки смс к отправке отдельной короткой транзакцией"""
+    now = timezone.now()
+    with transaction.atomic():
+        messages = list(SmsMessage.objects.select_for_update(
+            skip_locked=True
+        ).filter(
+            status=SMS_PENDING,
+            next_attempt__lte=now
+        )[:batch_size])
+        for message in messages:
+            message.status = SMS_SENDING
+            message.claimed = now
+            message.attempts += 1
+        SmsMessage.objects.bulk_update(
+            messages, ('status', 'claimed', 'attempts'))
+    return messages
+
+
+def finish_sms(message, **fields):
+    """Запись результата отправки, если смс не перехвачено другим воркером"""
+    SmsMessage.objects.filter(
+        pk=message.pk,
+        status=SMS_SENDING,
+        claimed=message.claimed
+    ).update(**fields)
+
+
+def drain_sms_outbox(
+    batch_size=SMS_OUTBOX_BATCH_SIZE,
+    run_time=SMS_OUTBOX_RUN_TIME
+):
+    """Отправка накопившихся смс пачками через одно соединение с бэкендом.
+
+    Пачка сначала захватывается (статус sending) и фиксируется, затем
+    смс отправляются вне транзакции, и результат каждого записывается
+    сразу. При падении воркера повторно уходят только смс, результат
+    которых не успел записаться. Новые пачки не берутся по прошествии
+    run_time секунд. Возвращает число отправленных и окончательно
+    не отправленных смс.
+    """
+    bucket = TokenBucket(settings.SMS_RATE_LIMIT, settings.SMS_RATE_BURST)
+    deadline = time.monotonic() + run_time
+    sent = failed = 0
+    release_stale_sms()
+    with get_connection() as connection:
+        while time.monotonic() < deadline:
+            messages = claim_sms(batch_size)
+            if not messages:
+                break
+            for message in messages:
+                bucket.take()
+                try:
+                    connection.send_messages([Message(
+                        message.text, message.sender, [message.recipient]
+                    )])
+                except Exception:
+                    if message.attempts >= settings.SMS_MAX_ATTEMPTS:
+                        finish_sms(message, status=SMS_FAILED)
+                        failed += 1
+                    else:
+                        finish_sms(
+                            message,
+                            status=SMS_PENDING,
+                            next_attempt=(
+                                timezone.now() + retry_delay(message.attempts)
+                            )
+                        )
+                else:
+                    finish_sms(message, status=SMS_SENT, sent=timezone.now())
+                    sent += 1
+    return sent, failed
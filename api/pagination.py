@@ -0,0 +1,95 @@
+from datetime import datetime
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor,
+    CursorPagination,
+    PageNumberPagination
+)
+
+from .cache import cached_catalogue_value
+
+
+class CachedCountPaginator(Paginator):
+    """Пагинатор, берущий число объектов из кэша каталога"""
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, 'query'):
+            return super().count
+        return cached_catalogue_value(
+            'count', str(self.object_list.query), self.object_list.count)
+
+
+class CoverPagination(PageNumberPagination):
+    """Постраничный вывод обложек с кэшированием COUNT(*)"""
+    django_paginator_class = CachedCountPaginator
+
+
+class CoverCursorPagination(CursorPagination):
+    """Постраничный вывод обложек по курсору, без подсчета общего числа"""
+    ordering = ('name', 'id')
+
+
+class TransactionCursorPagination(CursorPagination):
+    """Постраничный вывод истории транзакций по ключу (timestamp, id)
+
+    Курсор хранит пару значений крайней записи страницы, следующая
+    страница выбирается условием по обоим полям, без OFFSET.
+    """
+    ordering = ('-timestamp', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        if reverse:
+            queryset = queryset.order_by('timestamp', 'id')
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if self.cursor is not None:
+            timestamp, pk = self.parse_position(self.cursor.position)
+            lookup = 'gt' if reverse else 'lt'
+            queryset = queryset.filter(
+                Q(**{f'timestamp__{lookup}': timestamp})
+                | Q(timestamp=timestamp, **{f'id__{lookup}': pk})
+            )
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+        return self.page
+
+    def parse_position(self, position):
+        try:
+            timestamp, pk = position.rsplit('|', 1)
+            return datetime.fromisoformat(timestamp), int(pk)
+        except (AttributeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def link(self, transaction, reverse):
+        return self.encode_cursor(Cursor(
+            offset=0,
+            reverse=reverse,
+            position=f'{transaction.timestamp.isoformat()}|{transaction.id}'
+        ))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.link(self.page[0], reverse=True)
@@ -0,0 +1,115 @@
+import hashlib
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from .constants import (
+    RECEIPT_CACHE,
+    RECEIPT_FONT,
+    RECEIPT_FONT_FILE,
+    RECEIPT_HEADER,
+    RECEIPT_LINES,
+    RECEIPT_LINES_FONT_SIZE,
+    RECEIPT_LINES_STEP,
+    RECEIPT_LINES_TOP,
+    RECEIPT_LINES_X,
+    RECEIPT_MEDIA_DIR,
+    RECEIPT_MEDIA_PATH
+)
+
+
+def register_receipt_font():
+    """Однократная регистрация шрифта чеков при запуске приложения"""
+    if RECEIPT_FONT not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(
+            TTFont(RECEIPT_FONT, settings.BASE_DIR / RECEIPT_FONT_FILE))
+
+
+def render_receipt(phone_number, name, end_date, promocode, price):
+    """Чек в PDF: статичный шаблон и данные подписки"""
+    buffer = BytesIO()
+    page = canvas.Canvas(buffer)
+    for size, x, y, text in RECEIPT_HEADER:
+        page.setFont(RECEIPT_FONT, size=size)
+        page.drawString(x, y, text)
+    text = page.beginText(RECEIPT_LINES_X, RECEIPT_LINES_TOP)
+    text.setFont(RECEIPT_FONT, RECEIPT_LINES_FONT_SIZE,
+                 leading=RECEIPT_LINES_STEP)
+    for line in RECEIPT_LINES:
+        text.textLine(line.format(
+            phone_number=phone_number,
+            name=name,
+            end_date=end_date,
+            price=price,
+            promocode=promocode
+        ))
+    page.drawText(text)
+    page.showPage()
+    page.save()
+    return buffer.getvalue()
+
+
+def receipt_fields(usersubscription):
+    """Данные чека для подписки пользователя"""
+    return {
+        'phone_number': usersubscription.user.phone_number,
+        'name': usersubscription.subscription.name,
+        'end_date': str(usersubscription.end_date),
+        'promocode': usersubscription.promocode,
+        'price': str(usersubscription.price),
+    }
+
+
+def receipt_etag(**fields):
+    """ETag чека: хэш данных, из которых он строится"""
+    digest = hashlib.sha256('\x1f'.join(
+        f'{name}={value}' for name, value in sorted(fields.items())
+    ).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def cached_receipt(etag, **fields):
+    """Чек из кэша или новый; возвращает PDF и время генерации"""
+    receipt = caches[RECEIPT_CACHE].get(etag)
+    if receipt is None:
+        receipt = (render_receipt(**fields), timezone.now())
+        caches[RECEIPT_CACHE].set(etag, receipt)
+    return receipt
+
+
+def receipt_path(etag):
+    """Путь к файлу чека в хранилище медиафайлов"""
+    return RECEIPT_MEDIA_PATH.format(digest=etag.strip('"'))
+
+
+def save_receipt(path, **fields):
+    """Сохранение чека в хранилище медиафайлов, если его там еще нет
+
+    Копия, сохраненная под другим именем из-за параллельной задачи,
+    удаляется.
+    """
+    if default_storage.exists(path):
+        return
+    name = default_storage.save(path, ContentFile(render_receipt(**fields)))
+    if name != path:
+        default_storage.delete(name)
+
+
+def delete_expired_receipts(before):
+    """Удаление файлов чеков, сохраненных раньше указанного времени"""
+    if not default_storage.exists(RECEIPT_MEDIA_DIR):
+        return 0
+    count = 0
+    for name in default_storage.listdir(RECEIPT_MEDIA_DIR)[1]:
+        path = f'{RECEIPT_MEDIA_DIR}/{name}'
+        if default_storage.get_modified_time(path) < before:
+            default_storage.delete(path)
+            count += 1
+    return count
@@ -0,0 +1,109 @@
+from bisect import bisect_left
+
+from django.db import connection
+from django.db.models.functions import Upper
+
+from .cache import catalogue_version
+from subscriptions.models import Category, Cover
+
+PREFIX_END = '\U0010ffff'
+
+
+class CoverIndex:
+    """Индекс названий обложек в памяти процесса для автодополнения.
+
+    Названия в верхнем регистре хранятся в отсортированном массиве,
+    категории - битовыми масками позиций в этом массиве. Верхний регистр
+    и порядок выдачи берутся из БД (UPPER и сортировка ('name', 'id')
+    с ее правилами сравнения), как у фильтра istartswith.
+
+    covers - пары (id, UPPER(name)) в порядке сортировки БД,
+    folding - верхний регистр символов по правилам UPPER в БД.
+    """
+
+    def __init__(self, version, covers, cover_categories, categories,
+                 folding):
+        entries = sorted(
+            (upper_name, rank, cover_id)
+            for rank, (cover_id, upper_name) in enumerate(covers)
+        )
+        self.version = version
+        self.folding = folding
+        self.names = [upper_name for upper_name, _, _ in entries]
+        self.ranks = [rank for _, rank, _ in entries]
+        self.ids = [cover_id for _, _, cover_id in entries]
+        positions = {
+            cover_id: position for position, cover_id in enumerate(self.ids)
+        }
+        self.categories = dict.fromkeys(categories, 0)
+        for cover_id, category in cover_categories:
+            self.categories[category] |= 1 << positions[cover_id]
+
+    @classmethod
+    def build(cls):
+        version = catalogue_version()
+        covers = list(Cover.objects.order_by('name', 'id').values_list(
+            'id', Upper('name')))
+        return cls(
+            version,
+            covers,
+            Cover.categories.through.objects.values_list(
+                'cover_id', 'category__name'),
+            Category.objects.values_list('name', flat=True),
+            database_folding(''.join(name for _, name in covers))
+        )
+
+    def search(self, prefix='', categories=()):
+        """id обложек с названием на prefix из любой категории categories.
+
+        Порядок совпадает с сортировкой списка обложек ('name', 'id').
+        """
+        prefix = ''.join(
+            self.folding.get(char, char.upper()) for char in prefix)
+        start = bisect_left(self.names, prefix)
+        end = bisect_left(self.names, prefix + PREFIX_END, start)
+        if categories:
+            mask = 0
+            for category in categories:
+                mask |= self.categories[category]
+            mask = mask >> start & ((1 << (end - start)) - 1)
+            positions = []
+            while mask:
+                lowest = mask & -mask
+                positions.append(start + lowest.bit_length() - 1)
+                mask ^= lowest
+        else:
+            positions = range(start, end)
+        return [
+            self.ids[position] for position in sorted(
+                positions, key=self.ranks.__getitem__)
+        ]
+
+
+def database_folding(text):
+    """Верхний регистр символов text и их вариантов по правилам UPPER в БД"""
+    chars = sorted({
+        variant
+        for char in set(text)
+        for variant in (char, char.lower(), char.upper())
+        if len(variant) == 1 and variant != '\n'
+    })
+    if not chars:
+        return {}
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT UPPER(CAST(%s AS TEXT))', ['\n'.join(chars)])
+        return dict(zip(chars, cursor.fetchone()[0].split('\n')))
+
+
+_cover_index = None
+
+
+def cover_index():
+    """Актуальный индекс обложек: пересобирается при смене версии каталога"""
+    global _cover_index
+    if (
+        _cover_index is None
+        or _cover_index.version != catalogue_version()
+    ):
+        _cover_index = CoverIndex.build()
+    return _cover_index
@@ -1,6 +1,7 @@
 from datetime import timedelta
 
-from django.db.models import Exists, Max, Min, OuterRef, Sum
+from django.db import transaction
+from django.db.models import Exists, OuterRef
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from drf_spectacular.types import OpenApiTypes
@@ -13,26 +14,27 @@ from .constants import (
     NO_DATA_TRANSFERED,
     PAY2U_PHONE_NUMBER,
     SMS_TEXT,
-    SUBSCRIPTION_EXIST_ERROR
-
+    SUBSCRIPTION_EXIST_ERROR,
+    USERSUBSCRIPTIONS_ATTR
 )
-from .tasks import send_sms_task
+from .outbox import enqueue_sms
 from subscriptions import (
     ANNUAL,
-    DONE,
     LENGTH_LIMIT_PHONE_NUMBER_FIELD,
     MONTH,
     SEMI_ANNUAL,
     SUBSCRIPTION_PERIOD
 )
+from subscriptions.cache import active_cover_ids
 from subscriptions.models import (
     Category,
     Cover,
     Subscription,
+    Transaction,
     User,
     UserSubscription,
 )
-from .functions import cashback_calculation, payment, promocode_generator
+from .functions import payment, promocode_generator
 
 
 class GetTokenSerializer(serializers.Serializer):
@@ -73,25 +75,22 @@ class CoverSerializer(serializers.ModelSerializer):
 
     @extend_schema_field(OpenApiTypes.DECIMAL)
     def get_price(self, obj):
-        return str(min(obj.subscriptions.aggregate(
-            min_monthly_price=Min('monthly_price'),
-            min_semi_annual_price=Min('semi_annual_price'),
-            min_annual_price=Min('annual_price')
-        ).values()))
+        if obj.min_price is None:
+            return None
+        return str(obj.min_price)
 
     @extend_schema_field(OpenApiTypes.DECIMAL)
     def get_cashback_percent(self, obj):
-        return str(obj.subscriptions.aggregate(
-            Max('cashback_percent')
-        ).get('cashback_percent__max'))
+        if obj.max_cashback_percent is None:
+            return None
+        return str(obj.max_cashback_percent)
 
     @extend_schema_field(OpenApiTypes.BOOL)
     def get_is_subscribed(self, obj):
-        return UserSubscription.objects.filter(
-            subscription__in=obj.subscriptions.all(),
-            user=self.context.get('request').user,
-            end_date__gte=timezone.now().date()
-        ).exists()
+        if 'active_cover_ids' not in self.context:
+            self.context['active_cover_ids'] = active_cover_ids(
+                self.context.get('request').user.id)
+        return obj.pk in self.context['active_cover_ids']
 
 
 class SubscriptionSerializer(serializers.ModelSerializer):
@@ -102,20 +101,29 @@ class SubscriptionSerializer(serializers.ModelSerializer):
         model = Subscription
         exclude = ('users',)
 
+    def get_usersubscription(self, obj):
+        """Подписка пользователя, загружаемая один раз за запрос"""
+        if hasattr(obj, USERSUBSCRIPTIONS_ATTR):
+            return next(iter(getattr(obj, USERSUBSCRIPTIONS_ATTR)), None)
+        usersubscriptions = self.context.setdefault('usersubscriptions', {})
+        if obj.pk not in usersubscriptions:
+            usersubscriptions[obj.pk] = obj.usersubscriptions.filter(
+                user=self.context.get('request').user
+            ).first()
+        return usersubscriptions[obj.pk]
+
     @extend_schema_field(OpenApiTypes.DATE)
     def get_end_date(self, obj):
-        usersubscription = obj.usersubscriptions.filter(
-            user=self.context.get('request').user
-        ).first()
+        usersubscription = self.get_usersubscription(obj)
         return str(usersubscription.end_date) if usersubscription else None
 
     @extend_schema_field(OpenApiTypes.BOOL)
     def get_is_subscribed(self, obj):
-        return UserSubscription.objects.filter(
-            subscription=obj,
-            user=self.context.get('request').user,
-            end_date__gte=timezone.now().date()
-        ).exists()
+        usersubscription = self.get_usersubscription(obj)
+        return bool(
+            usersubscription
+            and usersubscription.end_date >= timezone.now().date()
+        )
 
 
 class CoverRetrieveSerializer(serializers.ModelSerializer):
@@ -188,13 +196,23 @@ class UserSerializer(serializers.ModelSerializer):
 
     @extend_schema_field(OpenApiTypes.DECIMAL)
     def get_current_month_expenses(self, user):
-        return user.transactions.filter(
-            timestamp__month=timezone.now().month,
-            timestamp__year=timezone.now().year,
-            status=DONE
-        ).aggregate(
-            current_month_expenses=Sum('amount')
-        )['current_month_expenses']
+        return user.current_month_expenses
+
+
+class TransactionSerializer(serializers.ModelSerializer):
+    subscription_name = serializers.StringRelatedField(
+        source='subscription.name')
+
+    class Meta:
+        model = Transaction
+        fields = (
+            'id',
+            'subscription',
+            'subscription_name',
+            'amount',
+            'status',
+            'timestamp'
+        )
 
 
 class SubscriptionReadSerializer(SubscriptionSerializer):
@@ -220,23 +238,17 @@ class SubscriptionReadSerializer(SubscriptionSerializer):
 
     @extend_schema_field(OpenApiTypes.STR)
     def get_period(self, obj):
-        usersubscription = obj.usersubscriptions.filter(
-            user=self.context.get('request').user
-        ).first()
+        usersubscription = self.get_usersubscription(obj)
         return usersubscription.period if usersubscription else None
 
     @extend_schema_field(OpenApiTypes.BOOL)
     def get_autorenewal(self, obj):
-        usersubscription = obj.usersubscriptions.filter(
-            user=self.context.get('request').user
-        ).first()
+        usersubscription = self.get_usersubscription(obj)
         return usersubscription.autorenewal if usersubscription else None
 
     @extend_schema_field(OpenApiTypes.STR)
     def get_promocode(self, obj):
-        usersubscription = obj.usersubscriptions.filter(
-            user=self.context.get('request').user
-        ).first()
+        usersubscription = self.get_usersubscription(obj)
         return usersubscription.promocode if usersubscription else None
 
 
@@ -293,20 +305,19 @@ class SubscriptionWriteSerializer(serializers.ModelSerializer):
             ANNUAL: subscription.annual_price
         }
         price = period_accordance[period]
-        if not payment(user, subscription, price):
+        with transaction.atomic():
+            paid = payment(user, subscription, price)
+            if paid:
+                usersubscription = self.subscribe(
+                    user, subscription, period, price)
+        if not paid:
             raise serializers.ValidationError(INSUFFICIENT_FUNDS)
-        cashback_calculation(user, price, subscription.cashback_percent)
+        return usersubscription
+
+    def subscribe(self, user, subscription, period, price):
+        """Оформление оплаченной подписки и смс с промокодом"""
         promocode = promocode_generator()
-        send_sms_task.delay(
-            (SMS_TEXT.format(
-                name=subscription.name,
-                price=period_accordance[period],
-                description=subscription.description,
-                promocode=promocode)),
-            PAY2U_PHONE_NUMBER,
-            user.phone_number,
-        )
-        return UserSubscription.objects.create(
+        usersubscription = UserSubscription.objects.create(
             start_date=timezone.now().date(),
             end_date=(timezone.now().date() + timedelta(
                 days=ADDITION_SUBSCRIPTION_DAYS[period]
@@ -317,12 +328,35 @@ class SubscriptionWriteSerializer(serializers.ModelSerializer):
             subscription=subscription,
             promocode=promocode
         )
+        enqueue_sms(
+            (SMS_TEXT.format(
+                name=subscription.name,
+                price=price,
+                description=subscription.description,
+                promocode=promocode)),
+            PAY2U_PHONE_NUMBER,
+            user.phone_number,
+        )
+        return usersubscription
 
     def update(self, subscription, validated_data):
-        usersubscription = get_object_or_404(
-            UserSubscription,
-            subscription=subscription,
-            user=self.context.get('request').user)
+        with transaction.atomic():
+            usersubscription = get_object_or_404(
+                UserSubscription,
+                subscription=subscription,
+                user=self.context.get('request').user)
+            paid = self.renew(usersubscription, subscription, validated_data)
+            if paid:
+                usersubscription.save()
+        if not paid:
+            raise serializers.ValidationError(INSUFFICIENT_FUNDS)
+        return usersubscription
+
+    def renew(self, usersubscription, subscription, validated_data):
+        """Изменение условий подписки и оплата продления истекшей.
+
+        Возвращает False, если на продление не хватило средств.
+        """
         period = validated_data.get('period', usersubscription.period)
         autorenewal = validated_data.get(
             'autorenewal', usersubscription.autorenewal)
@@ -347,10 +381,9 @@ class SubscriptionWriteSerializer(serializers.ModelSerializer):
             }
             price = period_accordance[period]
             if not payment(user, subscription, price):
-                raise serializers.ValidationError(INSUFFICIENT_FUNDS)
-            cashback_calculation(user, price, subscription.cashback_percent)
+                return False
             promocode = promocode_generator()
-            send_sms_task.delay(
+            enqueue_sms(
                 (SMS_TEXT.format(
                     name=subscription.name,
                     price=period_accordance[period],
@@ -365,11 +398,14 @@ class SubscriptionWriteSerializer(serializers.ModelSerializer):
                 days=ADDITION_SUBSCRIPTION_DAYS[period]
             ))
             usersubscription.promocode = promocode
-
-        usersubscription.save()
-        return usersubscription
+        return True
 
     def to_representation(self, subscription):
         return SubscriptionReadSerializer(
             subscription.subscription,
-            context={'request': self.context.get('request')}).data
+            context={
+                'request': self.context.get('request'),
+                'usersubscriptions': {
+                    subscription.subscription_id: subscription
+                }
+            }).data
@@ -0,0 +1,18 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_catalogue
+from subscriptions.models import Category, Cover, Subscription
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Cover)
+@receiver(post_delete, sender=Cover)
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+@receiver(m2m_changed, sender=Cover.categories.through)
+def catalogue_changed(sender, **kwargs):
+    """Сброс кэша каталога после изменения его данных"""
+    transaction.on_commit(invalidate_catalogue)
@@ -1,57 +1,78 @@
-from datetime import timedelta
+from datetime import date, timedelta
+from uuid import uuid4
 
-from celery import shared_task
+from celery import chord, shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
 from django.utils import timezone
 from sms import send_sms
 
-from api.functions import cashback_calculation, payment
+from api.functions import credit_cashback, renew_subscriptions
 from api.constants import (
-    ADDITION_SUBSCRIPTION_DAYS,
+    AUTOPAYMENT_DISPATCH_REPORT,
     AUTOPAYMENT_REPORT,
     CASHBACK_CREDIT_REPORT,
-    INSUFFICIENT_FUNDS,
-    SEND_SMS_REPORT
+    RECEIPTS_CLEANUP_REPORT,
+    RECEIPTS_REPORT,
+    SEND_SMS_REPORT,
+    SMS_OUTBOX_BUSY_REPORT,
+    SMS_OUTBOX_LOCK_KEY,
+    SMS_OUTBOX_LOCK_TIMEOUT,
+    SMS_OUTBOX_REPORT
 )
-from subscriptions.models import User, UserSubscription
+from api.outbox import drain_sms_outbox
+from api.receipts import (
+    delete_expired_receipts,
+    receipt_etag,
+    receipt_fields,
+    receipt_path,
+    save_receipt
+)
+from subscriptions.models import UserSubscription
 
 
 @shared_task
 def autopayment():
     """Функция автоматческого продления подписок(планировшик)"""
-    count = 0
-    for usersubscription in UserSubscription.objects.filter(
-            timezone.now().date()).all():
-        if usersubscription.autorenewal:
-            if not payment(
-                usersubscription.user,
-                usersubscription.subscription,
-                usersubscription.price
-            ):
-                return INSUFFICIENT_FUNDS
-            cashback_calculation(
-                usersubscription.user,
-                usersubscription.price,
-                usersubscription.subscription.cashback_percent
-            )
-            usersubscription.end_date += timedelta(
-                days=ADDITION_SUBSCRIPTION_DAYS[usersubscription.period])
-            usersubscription.save()
-            count += 1
-    return AUTOPAYMENT_REPORT.format(count=count)
+    shards = settings.AUTOPAYMENT_SHARDS
+    due_date = timezone.now().date().isoformat()
+    chord(
+        autopayment_shard.s(shard, shards, due_date)
+        for shard in range(shards)
+    )(autopayment_report.s())
+    return AUTOPAYMENT_DISPATCH_REPORT.format(shards=shards)
+
+
+@shared_task(acks_late=True)
+def autopayment_shard(shard, shards, due_date):
+    """Продление подписок пользователей одного шарда"""
+    return renew_subscriptions(
+        UserSubscription.objects.alias(
+            shard=F('user_id') % shards
+        ).filter(
+            shard=shard,
+            end_date=date.fromisoformat(due_date),
+            autorenewal=True
+        ),
+        on_renewed=generate_receipts_task.delay
+    )
+
+
+@shared_task
+def autopayment_report(results):
+    """Сводный отчет по шардам автопродления"""
+    return AUTOPAYMENT_REPORT.format(
+        count=sum(done for done, _ in results),
+        failed=sum(failed for _, failed in results)
+    )
 
 
 @shared_task
 def cashback_credit():
     """Функция перевода средств из кэшбэка на счет(планировшик)"""
-    count = 0
-    for user in User.objects.all():
-        if user.usersubscriptions.first().start_date == timezone.now().date():
-            user.account_balance += user.cashback
-            user.cashback = 0
-            user.save()
-            count += 1
-
-    return CASHBACK_CREDIT_REPORT.format(count=count)
+    return CASHBACK_CREDIT_REPORT.format(
+        count=credit_cashback(timezone.now().date()))
 
 
 @shared_task
@@ -67,3 +88,52 @@ def send_sms_task(text, sender, recipient, country_code='+7'):
         country_code=country_code,
         recipient=recipient
     )
+
+
+@shared_task(ignore_result=True)
+def send_sms_outbox():
+    """Функция отправки очереди смс пачками(планировшик)
+
+    Блокировка снимается, только если ее не занял другой воркер после
+    истечения SMS_OUTBOX_LOCK_TIMEOUT.
+    """
+    token = uuid4().hex
+    if not cache.add(SMS_OUTBOX_LOCK_KEY, token, SMS_OUTBOX_LOCK_TIMEOUT):
+        return SMS_OUTBOX_BUSY_REPORT
+    try:
+        sent, failed = drain_sms_outbox()
+    finally:
+        if cache.get(SMS_OUTBOX_LOCK_KEY) == token:
+            cache.delete(SMS_OUTBOX_LOCK_KEY)
+    return SMS_OUTBOX_REPORT.format(sent=sent, failed=failed)
+
+
+@shared_task
+def generate_receipt_task(path, fields):
+    """Функция генерации чека в медиафайлы(очередь задач)"""
+    save_receipt(path, **fields)
+    return RECEIPTS_REPORT.format(count=1)
+
+
+@shared_task
+def generate_receipts_task(usersubscription_ids):
+    """Функция генерации чеков продленных подписок(очередь задач)"""
+    usersubscriptions = UserSubscription.objects.filter(
+        pk__in=usersubscription_ids
+    ).select_related('user', 'subscription')
+    count = 0
+    for usersubscription in usersubscriptions:
+        fields = receipt_fields(usersubscription)
+        save_receipt(
+            receipt_path(receipt_etag(id=usersubscription.id, **fields)),
+            **fields
+        )
+        count += 1
+    return RECEIPTS_REPORT.format(count=count)
+
+
+@shared_task
+def cleanup_receipts_task():
+    """Функция удаления устаревших файлов чеков(планировшик)"""
+    return RECEIPTS_CLEANUP_REPORT.format(count=delete_expired_receipts(
+        timezone.now() - timedelta(days=settings.RECEIPT_RETENTION_DAYS)))
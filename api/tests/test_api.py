@@ -1,17 +1,29 @@
 from datetime import timedelta
+import os
+from tempfile import TemporaryDirectory
 
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework.test import APITestCase, APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 from unittest.mock import patch
 
-from subscriptions import MONTH
+from api.filters import CoverFilter
+from api.search import cover_index
+from api.tasks import generate_receipt_task
+from subscriptions import DONE, MONTH, UNDONE
+from subscriptions.cache import active_cover_ids
 from subscriptions.models import (
     Category,
     Cover,
+    SmsMessage,
     Subscription,
+    Transaction,
     UserSubscription
 )
 User = get_user_model()
@@ -25,6 +37,7 @@ USER_NAME = 'my'
 SUBSCRIPTION_CREATE_NAME = 'subscription-list'
 SUBSCRIPTION_DETAIL_NAME = 'subscription-detail'
 SUBSCRIPTION_GET_REPORT_NAME = 'subscription-get-reciept'
+TRANSACTION_LIST_NAME = 'transaction-list'
 
 """Запросы"""
 SUBSCRIPTION_CREATE_DATA = {
@@ -48,8 +61,8 @@ COVER_LIST_RESULT = {
             'name': 'cover_name_1',
             'preview': 'preview',
             'logo_link': 'logo_link',
-            'price': '10',
-            'cashback_percent': '10',
+            'price': '10.00',
+            'cashback_percent': '10.00',
             'categories': [
                 1
             ],
@@ -60,8 +73,8 @@ COVER_LIST_RESULT = {
             'name': 'cover_name_2',
             'preview': 'preview',
             'logo_link': 'logo_link',
-            'price': '10',
-            'cashback_percent': '10',
+            'price': '10.00',
+            'cashback_percent': '10.00',
             'categories': [
             ],
             'is_subscribed': False
@@ -71,8 +84,8 @@ COVER_LIST_RESULT = {
             'name': 'cover_name_3',
             'preview': 'preview',
             'logo_link': 'logo_link',
-            'price': '10',
-            'cashback_percent': '10',
+            'price': '10.00',
+            'cashback_percent': '10.00',
             'categories': [
             ],
             'is_subscribed': False
@@ -205,6 +218,10 @@ SUBSCRIPTION_DETAIL_RESULT = {
 }
 
 
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'receipts': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+})
 class APITest(APITestCase):
     @classmethod
     def setUpTestData(cls):
@@ -285,6 +302,10 @@ class APITest(APITestCase):
             promocode='promocode2'
         )
 
+    def setUp(self):
+        for alias in ('default', 'receipts'):
+            caches[alias].clear()
+
     def test_receive_token(self):
         response = self.client.post(
             '/api/auth/token/', data={'phone_number': self.user.phone_number})
@@ -316,6 +337,182 @@ class APITest(APITestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data, COVER_LIST_RESULT)
 
+    def test_covers_list_queries_do_not_depend_on_page_size(self):
+        active_cover_ids(self.user.id)
+        with CaptureQueriesContext(connection) as small_page:
+            self.client.get(
+                reverse(COVER_LIST_NAME),
+                headers={'Authorization': f'Bearer {self.token}'}
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            for number in range(10):
+                cover = Cover.objects.create(
+                    name=f'extra_cover_{number}',
+                    preview='preview',
+                    logo_link='logo_link',
+                    service_link='service_link',
+                )
+                cover.categories.add(self.category)
+                Subscription.objects.create(
+                    name=f'extra_subscription_{number}',
+                    description='description',
+                    monthly_price=10,
+                    semi_annual_price=50,
+                    annual_price=95,
+                    cashback_percent=10,
+                    cover=cover
+                )
+        with CaptureQueriesContext(connection) as full_page:
+            response = self.client.get(
+                reverse(COVER_LIST_NAME),
+                headers={'Authorization': f'Bearer {self.token}'}
+            )
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertEqual(len(small_page), len(full_page))
+
+    def test_cover_summary_follows_subscription_changes(self):
+        self.active_subscription.monthly_price = 5
+        with self.captureOnCommitCallbacks(execute=True):
+            self.active_subscription.save()
+        response = self.client.get(
+            reverse(COVER_LIST_NAME),
+            headers={'Authorization': f'Bearer {self.token}'}
+        )
+        self.assertEqual(response.data['results'][0]['price'], '5.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.active_subscription.delete()
+        response = self.client.get(
+            reverse(COVER_LIST_NAME),
+            headers={'Authorization': f'Bearer {self.token}'}
+        )
+        self.assertIsNone(response.data['results'][0]['price'])
+        self.assertIsNone(response.data['results'][0]['cashback_percent'])
+
+    def test_covers_list_served_from_cache(self):
+        self.client.get(
+            reverse(COVER_LIST_NAME),
+            headers={'Authorization': f'Bearer {self.token}'}
+        )
+        with CaptureQueriesContext(connection) as cached:
+            response = self.client.get(
+                reverse(COVER_LIST_NAME),
+                headers={'Authorization': f'Bearer {self.token}'}
+            )
+        self.assertEqual(response.data, COVER_LIST_RESULT)
+        self.assertFalse(any(
+            'subscriptions_cover' in query['sql'] for query in cached
+        ))
+
+    def test_get_covers_list_by_cursor(self):
+        response = self.client.get(
+            reverse(COVER_LIST_NAME),
+            {'pagination': 'cursor'},
+            headers={'Authorization': f'Bearer {self.token}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('count', response.data)
+        self.assertEqual(
+            response.data['results'], COVER_LIST_RESULT['results'])
+
+    def test_covers_count_cached(self):
+        self.client.get(
+            reverse(COVER_LIST_NAME),
+            headers={'Authorization': f'Bearer {self.token}'}
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse(COVER_LIST_NAME),
+                {'page': 1},
+                headers={'Authorization': f'Bearer {self.token}'}
+            )
+        self.assertEqual(response.data['count'], 3)
+        self.assertFalse(any(
+            'COUNT(' in query['sql'] for query in queries))
+
+    def test_covers_search_by_index(self):
+        for params in (
+            {'name': 'COVER_NAME_'},
+            {'name': 'cover_name_2'},
+            {'name': 'missing'},
+            {'categories': ['category']},
+            {'name': 'cover', 'categories': ['category']},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(
+                    reverse(COVER_LIST_NAME),
+                    params,
+                    headers={'Authorization': f'Bearer {self.token}'}
+                )
+                self.assertEqual(
+                    [cover['id'] for cover in response.data['results']],
+                    list(CoverFilter(
+                        params, queryset=Cover.objects.order_by('name', 'id')
+                    ).qs.values_list('id', flat=True))
+                )
+
+    def test_covers_search_matches_database_order_and_case(self):
+        for name in ('Ёлка', 'ёж', 'Banana', 'banana', 'apple', 'Яблоко'):
+            Cover.objects.create(
+                name=name,
+                preview='preview',
+                logo_link='logo_link',
+                service_link='service_link',
+            ).categories.add(self.category)
+        for params in (
+            {'name': 'ё'},
+            {'name': 'Ё'},
+            {'name': 'b'},
+            {'name': 'я'},
+            {'categories': ['category']},
+            {'name': 'BAN', 'categories': ['category']},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(
+                    reverse(COVER_LIST_NAME),
+                    params,
+                    headers={'Authorization': f'Bearer {self.token}'}
+                )
+                self.assertEqual(
+                    [cover['id'] for cover in response.data['results']],
+                    list(CoverFilter(
+                        params, queryset=Cover.objects.order_by('name', 'id')
+                    ).qs.values_list('id', flat=True)[:10])
+                )
+
+    def test_covers_search_reads_only_page(self):
+        cover_index()
+        active_cover_ids(self.user.id)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse(COVER_LIST_NAME),
+                {'name': 'cover', 'categories': ['category']},
+                headers={'Authorization': f'Bearer {self.token}'}
+            )
+        self.assertEqual(response.data['count'], 1)
+        self.assertFalse(any(
+            'LIKE' in query['sql'] or 'COUNT(' in query['sql']
+            for query in queries
+        ))
+
+    def test_covers_search_index_follows_catalogue_changes(self):
+        cover_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cover_2.categories.add(self.category)
+        response = self.client.get(
+            reverse(COVER_LIST_NAME),
+            {'categories': ['category']},
+            headers={'Authorization': f'Bearer {self.token}'}
+        )
+        self.assertEqual(response.data['count'], 2)
+
+    def test_covers_search_unknown_category(self):
+        response = self.client.get(
+            reverse(COVER_LIST_NAME),
+            {'categories': 'unknown'},
+            headers={'Authorization': f'Bearer {self.token}'}
+        )
+        self.assertEqual(response.status_code, 400)
+
     def test_get_cover_detail(self):
         response = self.client.get(
             reverse(COVER_DETAIL_NAME, kwargs={'pk': self.cover_1.pk}),
@@ -332,30 +529,43 @@ class APITest(APITestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data, MY_RESULT)
 
+    def test_user_info_queries(self):
+        with self.assertNumQueries(4):
+            self.client.get(
+                reverse(USER_NAME),
+                headers={'Authorization': f'Bearer {self.token}'}
+            )
+
     def test_subscribe_new_subscription(self):
-        with patch('api.tasks.send_sms_task.delay') as mock_apply_async:
+        with patch(
+            'api.tasks.send_sms_outbox.apply_async'
+        ) as mock_apply_async:
             response = self.client.post(
                 reverse(SUBSCRIPTION_CREATE_NAME),
                 data=SUBSCRIPTION_CREATE_DATA,
                 headers={'Authorization': f'Bearer {self.token}'}
             )
-            mock_apply_async.assert_called_once
+            mock_apply_async.assert_not_called()
             SUBSCRIPTION_CREATE_RESULT[
                 'promocode'
             ] = UserSubscription.objects.get(
                 subscription=self.new_subscription).promocode
             self.assertEqual(response.status_code, 201)
             self.assertEqual(response.data, SUBSCRIPTION_CREATE_RESULT)
+            self.assertTrue(SmsMessage.objects.filter(
+                recipient='+7' + self.user.phone_number).exists())
 
     def test_subscribe_old_subscription(self):
-        with patch('api.tasks.send_sms_task.delay') as mock_apply_async:
+        with patch(
+            'api.tasks.send_sms_outbox.apply_async'
+        ) as mock_apply_async:
             response = self.client.patch(
                 reverse(SUBSCRIPTION_DETAIL_NAME,
                         kwargs={'pk': self.inactive_subscription.pk}),
                 data=SUBSCRIPTION_UPDATE_DATA,
                 headers={'Authorization': f'Bearer {self.token}'}
             )
-            mock_apply_async.assert_called_once
+            mock_apply_async.assert_not_called()
             SUBSCRIPTION_UPDATE_RESULT[
                 'promocode'
             ] = UserSubscription.objects.get(
@@ -363,6 +573,46 @@ class APITest(APITestCase):
             self.assertEqual(response.status_code, 200)
             self.assertEqual(response.data, SUBSCRIPTION_UPDATE_RESULT)
 
+    def test_failed_payment_recorded(self):
+        User.objects.filter(pk=self.user.pk).update(account_balance=1)
+        for response in (
+            self.client.post(
+                reverse(SUBSCRIPTION_CREATE_NAME),
+                data=SUBSCRIPTION_CREATE_DATA,
+                headers={'Authorization': f'Bearer {self.token}'}
+            ),
+            self.client.patch(
+                reverse(SUBSCRIPTION_DETAIL_NAME,
+                        kwargs={'pk': self.inactive_subscription.pk}),
+                data=SUBSCRIPTION_UPDATE_DATA,
+                headers={'Authorization': f'Bearer {self.token}'}
+            ),
+        ):
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            Transaction.objects.filter(user=self.user, status=UNDONE).count(),
+            2
+        )
+        self.assertFalse(UserSubscription.objects.filter(
+            subscription=self.new_subscription).exists())
+        self.assertFalse(SmsMessage.objects.exists())
+
+    def test_renewal_refreshes_is_subscribed(self):
+        self.assertNotIn(self.cover_2.id, active_cover_ids(self.user.id))
+        with patch('api.tasks.send_sms_outbox.apply_async'):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.patch(
+                    reverse(SUBSCRIPTION_DETAIL_NAME,
+                            kwargs={'pk': self.inactive_subscription.pk}),
+                    data=SUBSCRIPTION_UPDATE_DATA,
+                    headers={'Authorization': f'Bearer {self.token}'}
+                )
+        response = self.client.get(
+            reverse(COVER_LIST_NAME),
+            headers={'Authorization': f'Bearer {self.token}'}
+        )
+        self.assertTrue(response.data['results'][1]['is_subscribed'])
+
     def test_get_subscription_detail(self):
         response = self.client.get(
             reverse(SUBSCRIPTION_DETAIL_NAME, kwargs={
@@ -385,3 +635,141 @@ class APITest(APITestCase):
             f'Reciept#{self.active_subscription.id}.pdf',
             response['content-disposition']
         )
+
+    def test_get_reciept_link_false(self):
+        url = reverse(SUBSCRIPTION_GET_REPORT_NAME, kwargs={
+            'pk': self.active_subscription.pk})
+        for link in ('false', '0'):
+            with self.subTest(link=link):
+                response = self.client.get(
+                    url,
+                    {'link': link},
+                    headers={'Authorization': f'Bearer {self.token}'}
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    response['content-type'], 'application/pdf')
+        response = self.client.get(
+            url,
+            {'link': 'maybe'},
+            headers={'Authorization': f'Bearer {self.token}'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_reciept_cached(self):
+        url = reverse(SUBSCRIPTION_GET_REPORT_NAME, kwargs={
+            'pk': self.active_subscription.pk})
+        with patch('api.receipts.render_receipt',
+                   return_value=b'%PDF') as render_receipt:
+            response = self.client.get(
+                url, headers={'Authorization': f'Bearer {self.token}'})
+            cached = self.client.get(
+                url, headers={'Authorization': f'Bearer {self.token}'})
+            not_modified = self.client.get(
+                url,
+                headers={
+                    'Authorization': f'Bearer {self.token}',
+                    'If-None-Match': response['ETag']
+                }
+            )
+        render_receipt.assert_called_once()
+        self.assertEqual(cached.content, response.content)
+        self.assertIn('Last-Modified', response)
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_get_reciept_link(self):
+        url = reverse(SUBSCRIPTION_GET_REPORT_NAME, kwargs={
+            'pk': self.active_subscription.pk}) + '?link=true'
+        with TemporaryDirectory() as media_root:
+            with self.settings(MEDIA_ROOT=media_root):
+                with patch('api.views.generate_receipt_task.delay') as delay:
+                    for _ in range(2):
+                        response = self.client.get(
+                            url,
+                            headers={'Authorization': f'Bearer {self.token}'}
+                        )
+                        self.assertEqual(response.status_code, 202)
+                        self.assertTrue(response.data['url'].endswith(url))
+                    delay.assert_called_once()
+                    generate_receipt_task(*delay.call_args.args)
+                    generate_receipt_task(*delay.call_args.args)
+                    self.assertEqual(
+                        len(os.listdir(os.path.join(media_root, 'receipts'))),
+                        1
+                    )
+                response = self.client.get(
+                    url, headers={'Authorization': f'Bearer {self.token}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('/media/receipts/', response.data['url'])
+
+    def test_transactions_keyset_with_equal_timestamps(self):
+        Transaction.objects.bulk_create(
+            Transaction(
+                user=self.user,
+                subscription=self.active_subscription,
+                amount=10
+            )
+            for _ in range(25)
+        )
+        Transaction.objects.update(timestamp=timezone.now())
+        pages = []
+        url = reverse(TRANSACTION_LIST_NAME)
+        while url:
+            response = self.client.get(
+                url, headers={'Authorization': f'Bearer {self.token}'})
+            pages.append([result['id'] for result in response.data['results']])
+            url = response.data['next']
+        ids = sum(pages, [])
+        self.assertEqual(ids, sorted(
+            Transaction.objects.values_list('id', flat=True), reverse=True))
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        response = self.client.get(
+            response.data['previous'],
+            headers={'Authorization': f'Bearer {self.token}'}
+        )
+        self.assertEqual(
+            [result['id'] for result in response.data['results']], pages[1])
+        response = self.client.get(
+            reverse(TRANSACTION_LIST_NAME),
+            {'cursor': 'broken'},
+            headers={'Authorization': f'Bearer {self.token}'}
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_get_transactions(self):
+        Transaction.objects.bulk_create(
+            Transaction(
+                user=self.user,
+                subscription=self.active_subscription,
+                amount=10,
+                status=DONE if number % 4 else UNDONE
+            )
+            for number in range(12)
+        )
+        Transaction.objects.create(
+            user=User.objects.create(username='other', phone_number='888'),
+            subscription=self.active_subscription,
+            amount=10,
+            status=DONE
+        )
+        response = self.client.get(
+            reverse(TRANSACTION_LIST_NAME),
+            headers={'Authorization': f'Bearer {self.token}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('count', response.data)
+        self.assertEqual(len(response.data['results']), 10)
+        ids = [result['id'] for result in response.data['results']]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        response = self.client.get(
+            response.data['next'],
+            headers={'Authorization': f'Bearer {self.token}'}
+        )
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNone(response.data['next'])
+        response = self.client.get(
+            reverse(TRANSACTION_LIST_NAME),
+            {'status': UNDONE},
+            headers={'Authorization': f'Bearer {self.token}'}
+        )
+        self.assertEqual(len(response.data['results']), 3)
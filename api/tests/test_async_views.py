@@ -0,0 +1,119 @@
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.async_views import (
+    AsyncCategoryViewSet,
+    AsyncCoverViewSet,
+    AsyncUserView
+)
+from subscriptions import MONTH
+from subscriptions.cache import active_cover_ids
+from subscriptions.models import (
+    Category,
+    Cover,
+    MonthlyExpense,
+    Subscription,
+    UserSubscription
+)
+User = get_user_model()
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'receipts': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+})
+class AsyncViewsTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='user', phone_number='777')
+        cls.token = str(RefreshToken.for_user(cls.user).access_token)
+        cls.category = Category.objects.create(name='category')
+        cls.cover = Cover.objects.create(
+            name='cover_name',
+            preview='preview',
+            logo_link='logo_link',
+            service_link='service_link',
+        )
+        cls.cover.categories.add(cls.category)
+        subscription = Subscription.objects.create(
+            name='subscription',
+            description='description',
+            monthly_price=10,
+            semi_annual_price=50,
+            annual_price=95,
+            cashback_percent=10,
+            cover=cls.cover
+        )
+        UserSubscription.objects.create(
+            user=cls.user,
+            subscription=subscription,
+            end_date=timezone.now().date() + timedelta(days=15),
+            price=10,
+            period=MONTH,
+        )
+        MonthlyExpense.objects.create(
+            user=cls.user,
+            month=timezone.now().date().replace(day=1),
+            amount=10
+        )
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def async_get(self, view, path, **kwargs):
+        request = APIRequestFactory().get(
+            path, HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        return async_to_sync(view)(request, **kwargs)
+
+    def test_async_views_match_sync_views(self):
+        for path, view, kwargs in (
+            (
+                reverse('category-list'),
+                AsyncCategoryViewSet.as_view({'get': 'list'}),
+                {}
+            ),
+            (
+                reverse('category-detail', kwargs={'pk': self.category.pk}),
+                AsyncCategoryViewSet.as_view({'get': 'retrieve'}),
+                {'pk': self.category.pk}
+            ),
+            (
+                reverse('cover-list'),
+                AsyncCoverViewSet.as_view({'get': 'list'}),
+                {}
+            ),
+            (
+                reverse('cover-detail', kwargs={'pk': self.cover.pk}),
+                AsyncCoverViewSet.as_view({'get': 'retrieve'}),
+                {'pk': self.cover.pk}
+            ),
+            (reverse('my'), AsyncUserView.as_view(), {}),
+        ):
+            with self.subTest(path=path):
+                expected = self.client.get(
+                    path, headers={'Authorization': f'Bearer {self.token}'})
+                caches['default'].clear()
+                response = self.async_get(view, path, **kwargs)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data, expected.data)
+
+    def test_async_view_requires_token(self):
+        request = APIRequestFactory().get(reverse('my'))
+        response = async_to_sync(AsyncUserView.as_view())(request)
+        self.assertEqual(response.status_code, 401)
+
+    def test_async_cover_list_served_from_cache(self):
+        view = AsyncCoverViewSet.as_view({'get': 'list'})
+        self.async_get(view, reverse('cover-list'))
+        active_cover_ids(self.user.id)
+        with self.assertNumQueries(1):
+            response = self.async_get(view, reverse('cover-list'))
+        self.assertTrue(response.data['results'][0]['is_subscribed'])
@@ -0,0 +1,84 @@
+import json
+import os
+from io import StringIO
+from tempfile import TemporaryDirectory
+
+from django.core.management import call_command, CommandError
+from django.db.models import Sum
+from django.test import override_settings, TestCase
+
+from api.benchmark.scenarios import SCENARIOS
+from subscriptions import DONE
+from subscriptions.models import (
+    MonthlyExpense,
+    Transaction,
+    User,
+    UserSubscription
+)
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'receipts': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+})
+class BenchmarkTest(TestCase):
+    def test_benchmark_scenarios(self):
+        call_command(
+            'seed_benchmark', users=5, covers=4, stdout=StringIO())
+        usersubscriptions = UserSubscription.objects.count()
+        with TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'results.json')
+            call_command(
+                'benchmark', requests=3, output=output, stdout=StringIO())
+            with open(output) as file:
+                results = json.load(file)['results']
+        self.assertEqual(
+            [result['scenario'] for result in results], list(SCENARIOS))
+        for result in results:
+            with self.subTest(scenario=result['scenario']):
+                self.assertGreater(result['requests'], 0)
+                self.assertEqual(result['errors'], 0)
+                self.assertGreater(result['queries_per_request'], 0)
+        self.assertEqual(
+            UserSubscription.objects.count(), usersubscriptions)
+
+    def test_seed_adds_expenses_of_seeded_users_only(self):
+        user = User.objects.create(username='user', phone_number='777')
+        expense = MonthlyExpense.objects.create(
+            user=user, month='2024-01-01', amount=100)
+        call_command(
+            'seed_benchmark', users=3, covers=2, stdout=StringIO())
+        self.assertEqual(
+            MonthlyExpense.objects.get(pk=expense.pk).amount, 100)
+        for seeded in User.objects.exclude(pk=user.pk):
+            with self.subTest(user=seeded.username):
+                self.assertEqual(
+                    MonthlyExpense.objects.filter(user=seeded).aggregate(
+                        amount=Sum('amount'))['amount'] or 0,
+                    Transaction.objects.filter(
+                        user=seeded, status=DONE).aggregate(
+                        amount=Sum('amount'))['amount'] or 0
+                )
+
+    def test_benchmark_without_data(self):
+        stdout = StringIO()
+        with TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'results.json')
+            call_command(
+                'benchmark', requests=1, output=output, stdout=stdout)
+            with open(output) as file:
+                results = json.load(file)['results']
+        empty = ('catalogue_browse', 'my', 'purchase', 'renewal', 'receipt')
+        for result in results:
+            if result['scenario'] not in empty:
+                continue
+            with self.subTest(scenario=result['scenario']):
+                self.assertEqual(result['requests'], 0)
+                self.assertIn(
+                    f'{result["scenario"]}: no data to run on',
+                    stdout.getvalue()
+                )
+
+    def test_async_benchmark_without_data(self):
+        with self.assertRaisesMessage(CommandError, 'seed_benchmark first'):
+            call_command('benchmark_async', requests=1, stdout=StringIO())
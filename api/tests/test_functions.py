@@ -0,0 +1,112 @@
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings, TestCase, TransactionTestCase
+
+from api.functions import feistel_permutation, payment, promocode_generator
+from subscriptions import DONE, PROMOCODE_LENGHT, UNDONE
+from subscriptions.functions import rebuild_monthly_expenses
+from subscriptions.models import (
+    Cover,
+    MonthlyExpense,
+    Subscription,
+    Transaction
+)
+User = get_user_model()
+
+PAYMENT_THREADS = 8
+
+
+class PromocodeTest(TestCase):
+    def test_feistel_permutation_is_injective(self):
+        numbers = range(1, 10001)
+        self.assertEqual(
+            len({feistel_permutation(number) for number in numbers}),
+            len(numbers)
+        )
+
+    def test_promocode_generator(self):
+        promocodes = [promocode_generator() for _ in range(100)]
+        self.assertEqual(len(set(promocodes)), len(promocodes))
+        for promocode in promocodes:
+            self.assertRegex(promocode, rf'^[A-Z0-9]{{{PROMOCODE_LENGHT}}}$')
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'receipts': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+})
+class PaymentConcurrencyTest(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            username='user', phone_number='777', account_balance=100)
+        self.subscription = Subscription.objects.create(
+            name='subscription',
+            description='description',
+            monthly_price=10,
+            semi_annual_price=50,
+            annual_price=95,
+            cashback_percent=10,
+            cover=Cover.objects.create(
+                name='cover_name',
+                preview='preview',
+                logo_link='logo_link',
+                service_link='service_link',
+            )
+        )
+
+    def test_concurrent_payments(self):
+        def pay():
+            try:
+                return payment(self.user, self.subscription, Decimal(10))
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=PAYMENT_THREADS) as executor:
+            results = list(executor.map(
+                lambda _: pay(), range(PAYMENT_THREADS * 2)))
+        self.user.refresh_from_db()
+        self.assertEqual(results.count(True), 10)
+        self.assertEqual(self.user.account_balance, 0)
+        self.assertEqual(self.user.cashback, 10)
+        self.assertEqual(
+            MonthlyExpense.objects.get(user=self.user).amount, 100)
+        self.assertEqual(
+            Transaction.objects.filter(status=DONE).count(), 10)
+        self.assertEqual(
+            Transaction.objects.filter(status=UNDONE).count(),
+            PAYMENT_THREADS * 2 - 10
+        )
+
+
+class MonthlyExpensesTest(TestCase):
+    def test_rebuild_matches_incremental_rollup(self):
+        user = User.objects.create(
+            username='user', phone_number='777', account_balance=100)
+        subscription = Subscription.objects.create(
+            name='subscription',
+            description='description',
+            monthly_price=10,
+            semi_annual_price=50,
+            annual_price=95,
+            cashback_percent=10,
+            cover=Cover.objects.create(
+                name='cover_name',
+                preview='preview',
+                logo_link='logo_link',
+                service_link='service_link',
+            )
+        )
+        for amount in (10, 25, 500):
+            payment(user, subscription, Decimal(amount))
+        incremental = list(
+            MonthlyExpense.objects.values_list('user', 'month', 'amount'))
+        self.assertEqual(incremental[0][2], 35)
+        self.assertEqual(rebuild_monthly_expenses(), 1)
+        self.assertEqual(
+            list(MonthlyExpense.objects.values_list(
+                'user', 'month', 'amount')),
+            incremental
+        )
@@ -0,0 +1,98 @@
+import json
+import os
+from tempfile import TemporaryDirectory
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.constants import PROFILING_LOGGER
+from subscriptions.models import Category
+
+User = get_user_model()
+
+
+@override_settings(
+    PROFILING=True,
+    PROFILING_SLOW_MS=60000,
+    PROFILING_SAMPLE_RATE=0,
+    CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
+        },
+        'receipts': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
+        }
+    }
+)
+class ProfilingMiddlewareTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='user', phone_number='777')
+        cls.token = str(RefreshToken.for_user(cls.user).access_token)
+        Category.objects.create(name='category')
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def get(self, path):
+        return self.client.get(
+            path, headers={'Authorization': f'Bearer {self.token}'})
+
+    def test_profile_logged_and_sent_in_server_timing(self):
+        with self.assertLogs(PROFILING_LOGGER, 'INFO') as logs:
+            response = self.get(reverse('category-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(
+            response.headers['Server-Timing'],
+            r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries", '
+            r'serializer;dur=[\d.]+$'
+        )
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(logs.records[0].levelname, 'INFO')
+        self.assertEqual(record['view'], 'category-list')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['db_queries'], 0)
+        self.assertIn('SELECT', record['slowest_query'])
+        self.assertGreater(record['serializer_ms'], 0)
+        self.assertNotIn('profile', record)
+
+    def test_profile_counts_queries_under_asgi(self):
+        with self.assertLogs(PROFILING_LOGGER, 'INFO') as logs:
+            response = async_to_sync(self.async_client.get)(
+                reverse('category-list'),
+                headers={'Authorization': f'Bearer {self.token}'}
+            )
+        self.assertEqual(response.status_code, 200)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertGreater(record['db_queries'], 0)
+        self.assertIn(
+            f'desc="{record["db_queries"]} queries"',
+            response.headers['Server-Timing']
+        )
+
+    def test_slow_sampled_request_dumped_to_cprofile(self):
+        with (
+            TemporaryDirectory() as directory,
+            self.settings(
+                PROFILING_SLOW_MS=0,
+                PROFILING_SAMPLE_RATE=1,
+                PROFILING_DIR=directory
+            ),
+            self.assertLogs(PROFILING_LOGGER, 'WARNING') as logs
+        ):
+            self.get(reverse('category-list'))
+            record = json.loads(logs.records[0].getMessage())
+            self.assertEqual(os.listdir(directory), [
+                os.path.basename(record['profile'])
+            ])
+            self.assertTrue(record['profile'].endswith('category_list.prof'))
+
+    @override_settings(PROFILING=False)
+    def test_disabled_by_default(self):
+        response = self.get(reverse('category-list'))
+        self.assertNotIn('Server-Timing', response.headers)
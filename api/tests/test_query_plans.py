@@ -0,0 +1,111 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase
+from django.utils import timezone
+
+from api.filters import CoverFilter
+from api.views import UserView
+from subscriptions import DONE, MONTH
+from subscriptions.models import (
+    Cover,
+    Subscription,
+    Transaction,
+    UserSubscription
+)
+User = get_user_model()
+
+USERS_AMOUNT = 200
+SUBSCRIPTIONS_AMOUNT = 25
+
+
+class QueryPlansTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        today = timezone.now().date()
+        users = User.objects.bulk_create(
+            User(username=f'user_{number}', phone_number=str(number))
+            for number in range(USERS_AMOUNT)
+        )
+        cover = Cover.objects.create(
+            name='cover_name',
+            preview='preview',
+            logo_link='logo_link',
+            service_link='service_link',
+        )
+        subscriptions = Subscription.objects.bulk_create(
+            Subscription(
+                name=f'subscription_{number}',
+                description='description',
+                monthly_price=10,
+                semi_annual_price=50,
+                annual_price=95,
+                cashback_percent=10,
+                cover=cover
+            )
+            for number in range(SUBSCRIPTIONS_AMOUNT)
+        )
+        UserSubscription.objects.bulk_create(
+            UserSubscription(
+                user=user,
+                subscription=subscription,
+                end_date=today + timedelta(days=(user.pk + number) % 60),
+                price=10,
+                period=MONTH,
+                autorenewal=bool(number % 2)
+            )
+            for user in users
+            for number, subscription in enumerate(subscriptions)
+        )
+        Transaction.objects.bulk_create(
+            Transaction(
+                user=user,
+                subscription=subscription,
+                amount=10,
+                status=DONE
+            )
+            for user in users
+            for subscription in subscriptions
+        )
+        cls.user = users[0]
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+    def assert_no_full_scan(self, queryset, table):
+        plan = queryset.explain()
+        self.assertNotRegex(plan, rf'(^|\W)(SCAN|Seq Scan on) {table}\b')
+
+    def test_renewal_scan_uses_index(self):
+        self.assert_no_full_scan(
+            UserSubscription.objects.alias(
+                shard=F('user_id') % 8
+            ).filter(
+                shard=0,
+                end_date=timezone.now().date(),
+                autorenewal=True
+            ),
+            'subscriptions_usersubscription'
+        )
+
+    def test_user_subscriptions_use_index(self):
+        self.assert_no_full_scan(
+            UserSubscription.objects.filter(user=self.user),
+            'subscriptions_usersubscription'
+        )
+
+    def test_month_expenses_use_index(self):
+        self.assert_no_full_scan(
+            UserView().get_queryset().filter(pk=self.user.pk),
+            'subscriptions_monthlyexpense'
+        )
+
+    def test_cover_name_prefix_uses_index(self):
+        self.assert_no_full_scan(
+            CoverFilter(
+                {'name': 'cov'}, queryset=Cover.objects.all()
+            ).qs,
+            'subscriptions_cover'
+        )
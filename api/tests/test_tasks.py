@@ -0,0 +1,285 @@
+from datetime import timedelta
+from decimal import Decimal
+import os
+from tempfile import TemporaryDirectory
+
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import DatabaseError
+from django.test import override_settings, TestCase
+from django.utils import timezone
+
+from api.constants import SMS_OUTBOX_LOCK_KEY
+from api.functions import renew_subscriptions
+from api.outbox import drain_sms_outbox, enqueue_sms
+from api.receipts import receipt_fields, save_receipt
+from api.tasks import (
+    autopayment,
+    autopayment_report,
+    autopayment_shard,
+    cashback_credit,
+    cleanup_receipts_task,
+    send_sms_outbox
+)
+from pay2u.celery import app
+from subscriptions import (
+    DONE,
+    MONTH,
+    SMS_FAILED,
+    SMS_PENDING,
+    SMS_SENDING,
+    SMS_SENT,
+    UNDONE
+)
+from subscriptions.models import (
+    Cover,
+    SmsMessage,
+    Subscription,
+    Transaction,
+    UserSubscription
+)
+User = get_user_model()
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'receipts': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+})
+class TasksTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.now().date()
+        cls.rich_user = User.objects.create(
+            username='rich_user',
+            phone_number='111',
+            account_balance=100
+        )
+        cls.poor_user = User.objects.create(
+            username='poor_user',
+            phone_number='222',
+            account_balance=15
+        )
+        cover = Cover.objects.create(
+            name='cover_name',
+            preview='preview',
+            logo_link='logo_link',
+            service_link='service_link',
+        )
+        cls.subscriptions = [
+            Subscription.objects.create(
+                name=f'subscription_{number}',
+                description='description',
+                monthly_price=10,
+                semi_annual_price=50,
+                annual_price=95,
+                cashback_percent=10,
+                cover=cover
+            )
+            for number in range(2)
+        ]
+        for user in (cls.rich_user, cls.poor_user):
+            for subscription in cls.subscriptions:
+                UserSubscription.objects.create(
+                    user=user,
+                    subscription=subscription,
+                    end_date=cls.today,
+                    price=10,
+                    period=MONTH,
+                )
+        UserSubscription.objects.filter(
+            user=cls.rich_user, subscription=cls.subscriptions[1]
+        ).update(autorenewal=False)
+
+    def setUp(self):
+        app.conf.task_always_eager = True
+        self.addCleanup(setattr, app.conf, 'task_always_eager', False)
+
+    def test_autopayment(self):
+        with TemporaryDirectory() as media_root:
+            with self.settings(MEDIA_ROOT=media_root):
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.assertEqual(
+                        autopayment(), 'Prolongations dispatched to 8 shards')
+                self.assertEqual(
+                    len(os.listdir(os.path.join(media_root, 'receipts'))), 2)
+        self.rich_user.refresh_from_db()
+        self.poor_user.refresh_from_db()
+        self.assertEqual(self.rich_user.account_balance, 90)
+        self.assertEqual(self.rich_user.cashback, 1)
+        self.assertEqual(self.poor_user.account_balance, 5)
+        self.assertEqual(self.poor_user.cashback, 1)
+        self.assertEqual(
+            UserSubscription.objects.filter(
+                end_date=self.today + timedelta(days=30)).count(),
+            2
+        )
+        self.assertEqual(
+            Transaction.objects.filter(status=DONE).count(), 2)
+        self.assertEqual(
+            Transaction.objects.filter(
+                status=UNDONE, user=self.poor_user).count(),
+            1
+        )
+
+    def test_autopayment_shards_charge_once(self):
+        for report in (
+            'Prolongations for 2 clients done, 1 failed',
+            'Prolongations for 0 clients done, 1 failed'
+        ):
+            self.assertEqual(autopayment_report([
+                autopayment_shard(shard, 3, self.today.isoformat())
+                for shard in range(3)
+            ]), report)
+        self.rich_user.refresh_from_db()
+        self.assertEqual(self.rich_user.account_balance, 90)
+
+    def test_renewal_rolled_back_when_charge_fails(self):
+        with patch.object(User.objects, 'select_for_update') as locked:
+            balances = locked.return_value.filter.return_value.values_list
+            balances.return_value = [(self.poor_user.pk, Decimal(100))]
+            with self.assertRaises(DatabaseError):
+                renew_subscriptions(
+                    UserSubscription.objects.filter(user=self.poor_user))
+        self.poor_user.refresh_from_db()
+        self.assertEqual(self.poor_user.account_balance, 15)
+        self.assertFalse(UserSubscription.objects.filter(
+            user=self.poor_user, end_date__gt=self.today).exists())
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_receipt_saved_once(self):
+        fields = receipt_fields(
+            UserSubscription.objects.select_related(
+                'user', 'subscription').first()
+        )
+        with TemporaryDirectory() as media_root:
+            with self.settings(MEDIA_ROOT=media_root):
+                save_receipt('receipts/receipt.pdf', **fields)
+                exists = default_storage.exists
+                checks = []
+
+                def raced_exists(name):
+                    """Первая проверка не видит чек другой задачи"""
+                    checks.append(name)
+                    return len(checks) > 1 and exists(name)
+
+                with patch(
+                    'api.receipts.default_storage.exists', raced_exists
+                ):
+                    save_receipt('receipts/receipt.pdf', **fields)
+                self.assertEqual(
+                    os.listdir(os.path.join(media_root, 'receipts')),
+                    ['receipt.pdf']
+                )
+
+    def test_cleanup_receipts(self):
+        fields = receipt_fields(
+            UserSubscription.objects.select_related(
+                'user', 'subscription').first()
+        )
+        with TemporaryDirectory() as media_root:
+            with self.settings(MEDIA_ROOT=media_root):
+                for name in ('expired', 'fresh'):
+                    save_receipt(f'receipts/{name}.pdf', **fields)
+                expired = (
+                    timezone.now() - timedelta(days=31)
+                ).timestamp()
+                os.utime(
+                    os.path.join(media_root, 'receipts', 'expired.pdf'),
+                    (expired, expired)
+                )
+                self.assertEqual(
+                    cleanup_receipts_task(), '1 expired receipts removed')
+                self.assertEqual(
+                    os.listdir(os.path.join(media_root, 'receipts')),
+                    ['fresh.pdf']
+                )
+
+    def test_cashback_credit(self):
+        User.objects.filter(pk=self.rich_user.pk).update(cashback=5)
+        User.objects.create(
+            username='new_user', phone_number='333', cashback=5)
+        self.assertEqual(
+            cashback_credit(), 'Cashback crediting for 1 clients done')
+        self.rich_user.refresh_from_db()
+        self.assertEqual(self.rich_user.account_balance, 105)
+        self.assertEqual(self.rich_user.cashback, 0)
+
+    def test_send_sms_outbox(self):
+        for recipient in ('111', '111', '222'):
+            enqueue_sms('text', 'sender', recipient)
+        self.assertEqual(SmsMessage.objects.count(), 2)
+        with TemporaryDirectory() as sms_path:
+            with self.settings(SMS_FILE_PATH=sms_path):
+                self.assertEqual(
+                    send_sms_outbox(), '2 sms sent, 0 failed')
+                sms_log = ''.join(
+                    open(os.path.join(sms_path, name)).read()
+                    for name in os.listdir(sms_path)
+                )
+        self.assertIn('to: +7111', sms_log)
+        self.assertIn('to: +7222', sms_log)
+        self.assertFalse(
+            SmsMessage.objects.filter(status=SMS_PENDING).exists())
+
+    def test_sms_outbox_retries_with_backoff(self):
+        enqueue_sms('text', 'sender', '111')
+        with TemporaryDirectory() as sms_path, patch(
+            'sms.backends.filebased.SmsBackend.send_messages',
+            side_effect=OSError
+        ), self.settings(SMS_FILE_PATH=sms_path, SMS_MAX_ATTEMPTS=2):
+            self.assertEqual(drain_sms_outbox(), (0, 0))
+            message = SmsMessage.objects.get()
+            self.assertEqual(message.attempts, 1)
+            self.assertGreater(message.next_attempt, timezone.now())
+            self.assertEqual(drain_sms_outbox(), (0, 0))
+            SmsMessage.objects.update(next_attempt=timezone.now())
+            self.assertEqual(drain_sms_outbox(), (0, 1))
+        self.assertEqual(SmsMessage.objects.get().status, SMS_FAILED)
+
+    def test_sms_outbox_resends_only_unfinished_after_crash(self):
+        for recipient in ('111', '222', '333'):
+            enqueue_sms('text', 'sender', recipient)
+        with TemporaryDirectory() as sms_path, self.settings(
+            SMS_FILE_PATH=sms_path
+        ):
+            with patch(
+                'sms.backends.filebased.SmsBackend.send_messages',
+                side_effect=[1, SystemExit]
+            ), self.assertRaises(SystemExit):
+                drain_sms_outbox()
+            self.assertEqual(
+                SmsMessage.objects.filter(status=SMS_SENT).count(), 1)
+            self.assertEqual(
+                SmsMessage.objects.filter(status=SMS_SENDING).count(), 2)
+            self.assertEqual(drain_sms_outbox(), (0, 0))
+            SmsMessage.objects.filter(status=SMS_SENDING).update(
+                claimed=timezone.now() - timedelta(hours=1))
+            with patch(
+                'sms.backends.filebased.SmsBackend.send_messages'
+            ) as send_messages:
+                self.assertEqual(drain_sms_outbox(), (2, 0))
+        self.assertEqual(send_messages.call_count, 2)
+        self.assertEqual(
+            SmsMessage.objects.filter(status=SMS_SENT).count(), 3)
+
+    def test_send_sms_outbox_keeps_lock_of_other_worker(self):
+        def drain():
+            cache.set(SMS_OUTBOX_LOCK_KEY, 'other worker')
+            return 0, 0
+
+        self.addCleanup(cache.delete, SMS_OUTBOX_LOCK_KEY)
+        with patch('api.tasks.drain_sms_outbox', drain):
+            send_sms_outbox()
+        self.assertEqual(cache.get(SMS_OUTBOX_LOCK_KEY), 'other worker')
+
+    def test_send_sms_outbox_runs_once(self):
+        enqueue_sms('text', 'sender', '111')
+        cache.add(SMS_OUTBOX_LOCK_KEY, True)
+        self.addCleanup(cache.delete, SMS_OUTBOX_LOCK_KEY)
+        self.assertEqual(
+            send_sms_outbox(), 'SMS outbox is being sent by another worker')
+        self.assertTrue(
+            SmsMessage.objects.filter(status=SMS_PENDING).exists())
@@ -1,17 +1,24 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework import routers
 
+from .async_views import (
+    AsyncCategoryViewSet,
+    AsyncCoverViewSet,
+    AsyncUserView
+)
 from .views import (
     CategoryViewSet,
     CoverViewSet,
     GetTokenView,
     SubscriptionViewSet,
+    TransactionViewSet,
     UserView
 )
 router_v1 = routers.DefaultRouter()
 router_v1.register(
     r'covers',
-    CoverViewSet,
+    AsyncCoverViewSet if settings.ASYNC_API else CoverViewSet,
     basename='cover'
 )
 router_v1.register(
@@ -21,13 +28,22 @@ router_v1.register(
 )
 router_v1.register(
     r'categories',
-    CategoryViewSet,
+    AsyncCategoryViewSet if settings.ASYNC_API else CategoryViewSet,
     basename='category'
 )
+router_v1.register(
+    r'transactions',
+    TransactionViewSet,
+    basename='transaction'
+)
 
 
 urlpatterns = [
     path('v1/', include(router_v1.urls)),
     path('auth/token/', GetTokenView.as_view(), name='signup'),
-    path('my/', UserView.as_view(), name='my'),
+    path(
+        'my/',
+        (AsyncUserView if settings.ASYNC_API else UserView).as_view(),
+        name='my'
+    ),
 ]
@@ -1,15 +1,37 @@
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db.models import OuterRef, Prefetch, Subquery
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
-from drf_spectacular.utils import extend_schema, OpenApiResponse
-from rest_framework import mixins, status, viewsets
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import (
+    extend_schema,
+    OpenApiParameter,
+    OpenApiResponse
+)
+from rest_framework import mixins, serializers, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.views import APIView
 
-from .filters import CoverFilter
-from .functions import pdf_receipt_generator
+from .cache import (
+    cached_catalogue,
+    merge_cover_subscriptions,
+    merge_subscribed_covers
+)
+from .constants import RECEIPT_TASK_KEY, RECEIPT_TASK_TIMEOUT
+from .filters import CoverFilter, TransactionFilter
+from .functions import pdf_receipt_generator, usersubscriptions_prefetch
+from .pagination import (
+    CoverCursorPagination,
+    CoverPagination,
+    TransactionCursorPagination
+)
+from .receipts import receipt_etag, receipt_fields, receipt_path
+from .search import cover_index
 from .serializers import (
     CategorySerializer,
     CoverRetrieveSerializer,
@@ -17,12 +39,16 @@ from .serializers import (
     GetTokenSerializer,
     SubscriptionReadSerializer,
     SubscriptionWriteSerializer,
+    TransactionSerializer,
     UserSerializer
 )
+from .tasks import generate_receipt_task
 from subscriptions.models import (
     Category,
     Cover,
+    MonthlyExpense,
     Subscription,
+    Transaction,
     User,
     UserSubscription
 )
@@ -51,6 +77,28 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = CategorySerializer
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        return Response(cached_catalogue(
+            'categories', request,
+            lambda: super(CategoryViewSet, self).list(
+                request, *args, **kwargs).data
+        ))
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(cached_catalogue(
+            'category', request,
+            lambda: super(CategoryViewSet, self).retrieve(
+                request, *args, **kwargs).data
+        ))
+
+
+cover_list_schema = extend_schema(parameters=[OpenApiParameter(
+    'pagination',
+    OpenApiTypes.STR,
+    enum=('cursor',),
+    description='cursor: pagination by cursor without the total count'
+)])
+
 
 @extend_schema(tags=['Covers'])
 class CoverViewSet(viewsets.ReadOnlyModelViewSet):
@@ -58,19 +106,107 @@ class CoverViewSet(viewsets.ReadOnlyModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = CoverFilter
 
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            self._paginator = (
+                CoverCursorPagination()
+                if self.request is not None
+                and self.request.query_params.get('pagination') == 'cursor'
+                else CoverPagination()
+            )
+        return self._paginator
+
+    def get_queryset(self):
+        if self.action in ('retrieve',):
+            return Cover.objects.prefetch_related(
+                'categories',
+                Prefetch(
+                    'subscriptions',
+                    queryset=Subscription.objects.prefetch_related(
+                        usersubscriptions_prefetch(self.request.user)
+                    )
+                )
+            )
+        return Cover.objects.prefetch_related(
+            'categories').order_by('name', 'id')
+
     def get_serializer_class(self):
         if self.action in ('retrieve',):
             return CoverRetrieveSerializer
         return CoverSerializer
 
+    @cover_list_schema
+    def list(self, request, *args, **kwargs):
+        data = cached_catalogue(
+            'covers', request,
+            lambda: self.search(request) or super(CoverViewSet, self).list(
+                request, *args, **kwargs).data
+        )
+        return Response({
+            **data,
+            'results': merge_subscribed_covers(data['results'], request.user)
+        })
+
+    def search(self, request):
+        """Поиск по индексу в памяти процесса: из БД читается только страница.
+
+        Возвращает None, если запрос должен идти через фильтры в БД.
+        """
+        name = request.query_params.get('name', '')
+        categories = request.query_params.getlist('categories')
+        if (
+            not (name or categories)
+            or not isinstance(self.paginator, CoverPagination)
+        ):
+            return None
+        index = cover_index()
+        if not set(categories) <= index.categories.keys():
+            return None
+        page = self.paginate_queryset(index.search(name, categories))
+        covers = self.get_queryset().in_bulk(page)
+        return self.get_paginated_response(self.get_serializer(
+            [covers[cover_id] for cover_id in page if cover_id in covers],
+            many=True
+        ).data).data
+
+    def retrieve(self, request, *args, **kwargs):
+        data = cached_catalogue(
+            'cover', request,
+            lambda: super(CoverViewSet, self).retrieve(
+                request, *args, **kwargs).data
+        )
+        return Response({
+            **data,
+            'subscriptions': merge_cover_subscriptions(
+                data['subscriptions'], request.user)
+        })
+
 
 class UserView(APIView):
     serializer_class = UserSerializer
     pagination_class = None
 
+    def get_queryset(self):
+        return User.objects.prefetch_related(
+            Prefetch(
+                'usersubscriptions',
+                queryset=UserSubscription.objects.select_related(
+                    'subscription__cover'
+                ).prefetch_related('subscription__cover__categories')
+            )
+        ).annotate(
+            current_month_expenses=Subquery(MonthlyExpense.objects.filter(
+                user=OuterRef('pk'),
+                month=timezone.now().date().replace(day=1)
+            ).values('amount'))
+        )
+
     @extend_schema(tags=['Users'])
     def get(self, request):
-        return Response(UserSerializer(request.user).data)
+        return Response(UserSerializer(
+            get_object_or_404(self.get_queryset(), pk=request.user.pk)
+        ).data)
 
 
 @extend_schema(
@@ -87,28 +223,73 @@ class SubscriptionViewSet(
     queryset = Subscription.objects.all()
     http_method_names = ('get', 'post', 'patch')
 
+    def get_queryset(self):
+        if self.action in ('retrieve',):
+            return Subscription.objects.select_related(
+                'cover'
+            ).prefetch_related(
+                'cover__categories',
+                usersubscriptions_prefetch(self.request.user)
+            )
+        return Subscription.objects.all()
+
     def get_serializer_class(self):
         if self.action in ('retrieve',):
             return SubscriptionReadSerializer
         return SubscriptionWriteSerializer
 
     @extend_schema(
-        description='Get the receipt for the subscription',
+        description=(
+            'Get the receipt for the subscription. '
+            'With ?link=true returns a link to the file instead, '
+            'or 202 with the URL to poll while it is being generated'
+        ),
+        parameters=[OpenApiParameter('link', OpenApiTypes.BOOL)],
         responses={
             200: OpenApiResponse(
                 description='Receipt for the subscription',
+            ),
+            202: OpenApiResponse(
+                description='Receipt is being generated',
             )
         }
     )
     @action(methods=['get'], detail=True)
     def get_reciept(self, request, pk=None):
         usersubscription = get_object_or_404(
-            UserSubscription, subscription_id=pk, user=request.user)
-        return pdf_receipt_generator(
-            id=usersubscription.id,
-            phone_number=request.user.phone_number,
-            name=usersubscription.subscription.name,
-            end_date=usersubscription.end_date,
-            promocode=usersubscription.promocode,
-            price=usersubscription.price
+            UserSubscription.objects.select_related('user', 'subscription'),
+            subscription_id=pk,
+            user=request.user
         )
+        fields = receipt_fields(usersubscription)
+        if not serializers.BooleanField().to_internal_value(
+            request.query_params.get('link', False)
+        ):
+            return pdf_receipt_generator(
+                request, id=usersubscription.id, **fields)
+        path = receipt_path(receipt_etag(id=usersubscription.id, **fields))
+        if default_storage.exists(path):
+            return Response({
+                'url': request.build_absolute_uri(default_storage.url(path))
+            })
+        if cache.add(
+            RECEIPT_TASK_KEY.format(path=path), True, RECEIPT_TASK_TIMEOUT
+        ):
+            generate_receipt_task.delay(path, fields)
+        return Response(
+            {'url': request.build_absolute_uri()},
+            status=status.HTTP_202_ACCEPTED
+        )
+
+
+@extend_schema(tags=['Transactions'])
+class TransactionViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    serializer_class = TransactionSerializer
+    pagination_class = TransactionCursorPagination
+    filter_backends = (DjangoFilterBackend,)
+    filterset_class = TransactionFilter
+
+    def get_queryset(self):
+        return Transaction.objects.filter(
+            user_id=self.request.user.id
+        ).select_related('subscription')
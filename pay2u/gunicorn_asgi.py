@@ -0,0 +1,16 @@
+"""
+Gunicorn config for serving pay2u in ASGI mode (ASYNC_API=True).
+
+    gunicorn -c pay2u/gunicorn_asgi.py pay2u.asgi:application
+
+Each uvicorn worker is one process with one event loop, so use about one
+worker per CPU core instead of the thread-per-request sizing of WSGI.
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+worker_class = 'uvicorn.workers.UvicornWorker'
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
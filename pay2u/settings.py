@@ -17,6 +17,9 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = os.getenv('SECRET_KEY', 'test_key')
 
+# Key of the promocode permutation, changing it may produce duplicates
+PROMOCODE_SECRET = os.getenv('PROMOCODE_SECRET', SECRET_KEY)
+
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = os.getenv('DEBUG', 'False') == 'True'
 
@@ -45,6 +48,7 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = 'subscriptions.User'
 
 MIDDLEWARE = [
+    'api.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -88,6 +92,7 @@ if os.getenv('SQLITE_ACTIVATED', 'False') == 'True':
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
         }
     }
 else:
@@ -140,6 +145,9 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'collected_static'
 
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.getenv('MEDIA_ROOT', BASE_DIR / 'media')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -173,6 +181,11 @@ SPECTACULAR_SETTINGS = {
 }
 SMS_BACKEND = 'sms.backends.filebased.SmsBackend'
 SMS_FILE_PATH = BASE_DIR / 'sms'
+SMS_OUTBOX_INTERVAL = int(os.getenv('SMS_OUTBOX_INTERVAL', 5))
+SMS_RATE_LIMIT = float(os.getenv('SMS_RATE_LIMIT', 50))
+SMS_RATE_BURST = int(os.getenv('SMS_RATE_BURST', 50))
+SMS_MAX_ATTEMPTS = int(os.getenv('SMS_MAX_ATTEMPTS', 5))
+SMS_RETRY_DELAY = int(os.getenv('SMS_RETRY_DELAY', 30))
 
 if os.getenv('CSRF_TRUSTED_ORIGINS'):
     CSRF_TRUSTED_ORIGINS = os.getenv('CSRF_TRUSTED_ORIGINS').split(',')
@@ -182,12 +195,61 @@ CELERY_RESULT_BACKEND = 'django-db'
 
 CACHES = {
     'default': {
-        'BACKEND': os.getenv('CACHES_BACKEND', 'django.core.cache.backends.redis.RedisCache'),
-        'LOCATION': os.getenv('CACHES_LOCATION', 'redis://127.0.0.1:16379/1'),
-    }
+        'BACKEND': os.getenv(
+            'CACHES_BACKEND', 'django.core.cache.backends.redis.RedisCache'),
+        'LOCATION': os.getenv(
+            'CACHES_LOCATION', 'redis://127.0.0.1:16379/1'),
+    },
+    'receipts': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv(
+            'RECEIPTS_CACHE_LOCATION', BASE_DIR / 'receipts_cache'),
+        'TIMEOUT': 60 * 60 * 24 * 30,
+        'OPTIONS': {
+            'MAX_ENTRIES': int(
+                os.getenv('RECEIPTS_CACHE_MAX_ENTRIES', 10000)),
+        },
+    },
 }
 
 CELERY_CACHE_BACKEND = os.getenv('CELERY_CACHE_BACKEND', 'django-cache')
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
 CELERY_BEAT_SCHEDULER = os.getenv(
     'CELERY_BEAT_SCHEDULER', 'django_celery_beat.schedulers:DatabaseScheduler')
+
+AUTOPAYMENT_SHARDS = int(os.getenv('AUTOPAYMENT_SHARDS', 8))
+
+ASYNC_API = os.getenv('ASYNC_API', 'False') == 'True'
+
+PROFILING = os.getenv('PROFILING', 'False') == 'True'
+PROFILING_SLOW_MS = int(os.getenv('PROFILING_SLOW_MS', 500))
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0))
+PROFILING_DIR = os.getenv('PROFILING_DIR', BASE_DIR / 'profiles')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api.profiling': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+RECEIPT_RETENTION_DAYS = int(os.getenv('RECEIPT_RETENTION_DAYS', 30))
+
+CELERY_BEAT_SCHEDULE = {
+    'send-sms-outbox': {
+        'task': 'api.tasks.send_sms_outbox',
+        'schedule': SMS_OUTBOX_INTERVAL,
+    },
+    'cleanup-receipts': {
+        'task': 'api.tasks.cleanup_receipts_task',
+        'schedule': 60 * 60 * 24,
+    },
+}
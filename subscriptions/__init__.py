@@ -7,6 +7,10 @@ from .constants import (
     PHONE_NUMBER_ERROR_MESSAGE,
     PROMOCODE_LENGHT,
     SEMI_ANNUAL,
+    SMS_FAILED,
+    SMS_PENDING,
+    SMS_SENDING,
+    SMS_SENT,
     SUBSCRIPTION_PERIOD,
     UNDONE
 )
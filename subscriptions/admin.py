@@ -5,10 +5,12 @@ from django.contrib.auth.models import Group
 from django.utils import timezone
 from django.utils.safestring import mark_safe
 
+from .cache import user_subscriptions
 from .models import (
     Category,
     Card,
     Cover,
+    SmsMessage,
     Subscription,
     User,
     UserSubscription,
@@ -51,15 +53,19 @@ class UserAdmin(UserAdmin):
 
     @display(description='Активных подписок')
     def active_subscriptions_amount(self, user):
-        return user.usersubscriptions.filter(
-            end_date__gte=timezone.now().date()
-        ).count()
+        today = timezone.now().date()
+        return sum(
+            end_date >= today
+            for _, end_date in user_subscriptions(user.id).values()
+        )
 
     @display(description='Неактивных подписок')
     def inactive_subscriptions_amount(self, user):
-        return user.usersubscriptions.filter(
-            end_date__lt=timezone.now().date()
-        ).count()
+        today = timezone.now().date()
+        return sum(
+            end_date < today
+            for _, end_date in user_subscriptions(user.id).values()
+        )
 
 
 @admin.register(UserSubscription)
@@ -137,3 +143,18 @@ class CaedAdmin(admin.ModelAdmin):
     list_display = ('card_number',)
     list_filter = ('card_number',)
     search_fields = ('card_number',)
+
+
+@admin.register(SmsMessage)
+class SmsMessageAdmin(admin.ModelAdmin):
+    list_display = (
+        'recipient',
+        'status',
+        'attempts',
+        'next_attempt',
+        'created',
+        'claimed',
+        'sent'
+    )
+    list_filter = ('status',)
+    search_fields = ('recipient',)
@@ -0,0 +1,70 @@
+from django.core.cache import cache
+from django.utils import timezone
+
+from .constants import (
+    USER_SUBSCRIPTIONS_CACHE_TIMEOUT,
+    USER_SUBSCRIPTIONS_KEY
+)
+from .models import UserSubscription
+
+
+def user_subscriptions_rows(user_id):
+    return UserSubscription.objects.filter(user_id=user_id).values_list(
+        'subscription_id', 'subscription__cover_id', 'end_date'
+    )
+
+
+def user_subscriptions(user_id):
+    """Подписки пользователя: {id подписки: (id обложки, дата окончания)}"""
+    key = USER_SUBSCRIPTIONS_KEY.format(user_id=user_id)
+    subscriptions = cache.get(key)
+    if subscriptions is None:
+        subscriptions = {
+            subscription_id: (cover_id, end_date)
+            for subscription_id, cover_id, end_date
+            in user_subscriptions_rows(user_id)
+        }
+        cache.set(key, subscriptions, USER_SUBSCRIPTIONS_CACHE_TIMEOUT)
+    return subscriptions
+
+
+async def auser_subscriptions(user_id):
+    """Асинхронный вариант user_subscriptions"""
+    key = USER_SUBSCRIPTIONS_KEY.format(user_id=user_id)
+    subscriptions = await cache.aget(key)
+    if subscriptions is None:
+        subscriptions = {
+            subscription_id: (cover_id, end_date)
+            async for subscription_id, cover_id, end_date
+            in user_subscriptions_rows(user_id)
+        }
+        await cache.aset(key, subscriptions, USER_SUBSCRIPTIONS_CACHE_TIMEOUT)
+    return subscriptions
+
+
+def active_covers(subscriptions):
+    """Обложки действующих подписок из результата user_subscriptions"""
+    today = timezone.now().date()
+    return {
+        cover_id
+        for cover_id, end_date in subscriptions.values()
+        if end_date >= today
+    }
+
+
+def active_cover_ids(user_id):
+    """Обложки, на которые у пользователя есть действующая подписка"""
+    return active_covers(user_subscriptions(user_id))
+
+
+async def aactive_cover_ids(user_id):
+    """Асинхронный вариант active_cover_ids"""
+    return active_covers(await auser_subscriptions(user_id))
+
+
+def invalidate_user_subscriptions(*user_ids):
+    """Сброс кэша подписок пользователей"""
+    cache.delete_many([
+        USER_SUBSCRIPTIONS_KEY.format(user_id=user_id)
+        for user_id in user_ids
+    ])
@@ -11,6 +11,8 @@ LENGTH_LIMITS_LINK_FIELDS = 200
 DECIMAL_PLACES = 2
 MIN_VALUE_DECIMAL_FIELDS = Decimal.from_float(0.0)
 PROMOCODE_LENGHT = 13
+LENGTH_LIMIT_SMS_SENDER_FIELD = 16
+LENGTH_LIMIT_SMS_KEY_FIELD = 64
 
 """Сообщения об ошибках"""
 PROMOCODE_ERROR_MESSAGE = 'Промокод содержит недопустимые символы'
@@ -22,6 +24,10 @@ SEMI_ANNUAL = 'semi-annual'
 ANNUAL = 'annual'
 DONE = 'done'
 UNDONE = 'undone'
+SMS_PENDING = 'pending'
+SMS_SENDING = 'sending'
+SMS_SENT = 'sent'
+SMS_FAILED = 'failed'
 
 SUBSCRIPTION_PERIOD = (
     (MONTH, 'Месяц'),
@@ -29,6 +35,13 @@ SUBSCRIPTION_PERIOD = (
     (ANNUAL, 'Год')
 )
 
+SMS_STATUS = (
+    (SMS_PENDING, 'Ожидает отправки'),
+    (SMS_SENDING, 'Отправляется'),
+    (SMS_SENT, 'Отправлено'),
+    (SMS_FAILED, 'Не отправлено'),
+)
+
 TRANSACTION_STATUS = {
     (DONE, 'Выполнена'),
     (UNDONE, 'Не выполнена'),
@@ -70,3 +83,23 @@ TRANSACTION = (
     'Время: {timestamp} '
     'Статус: {status} '
 )
+
+MONTHLY_EXPENSE = (
+    'Пользователь: {user} '
+    'Месяц: {month} '
+    'Сумма: {amount} '
+)
+
+SMS_MESSAGE = (
+    'Получатель: {recipient} '
+    'Статус: {status} '
+    'Попыток: {attempts} '
+)
+
+"""Сообщения management-команд"""
+COVER_SUMMARY_REPORT = 'Summary rebuilt for {count} covers'
+MONTHLY_EXPENSES_REPORT = 'Monthly expenses rebuilt: {count} rows'
+
+"""Кэш подписок пользователя"""
+USER_SUBSCRIPTIONS_KEY = 'usersubscriptions:{user_id}'
+USER_SUBSCRIPTIONS_CACHE_TIMEOUT = 60 * 60 * 24
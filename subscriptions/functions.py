@@ -0,0 +1,40 @@
+from django.db import transaction
+from django.db.models import DateField, Max, Min, OuterRef, Subquery, Sum
+from django.db.models.functions import Least, TruncMonth
+
+from .constants import DONE
+from .models import Cover, MonthlyExpense, Subscription, Transaction
+
+
+def refresh_cover_summary(cover_ids=None):
+    """Пересчет минимальной цены и максимального кэшбека обложек"""
+    covers = Cover.objects.all()
+    if cover_ids is not None:
+        covers = covers.filter(pk__in=cover_ids)
+    subscriptions = Subscription.objects.filter(
+        cover=OuterRef('pk')
+    ).order_by().values('cover')
+    return covers.update(
+        min_price=Subquery(subscriptions.annotate(value=Least(
+            Min('monthly_price'),
+            Min('semi_annual_price'),
+            Min('annual_price')
+        )).values('value')),
+        max_cashback_percent=Subquery(subscriptions.annotate(
+            value=Max('cashback_percent')
+        ).values('value'))
+    )
+
+
+def rebuild_monthly_expenses():
+    """Пересчет расходов пользователей по месяцам из журнала транзакций"""
+    with transaction.atomic():
+        MonthlyExpense.objects.all().delete()
+        return len(MonthlyExpense.objects.bulk_create(
+            MonthlyExpense(**expense)
+            for expense in Transaction.objects.filter(status=DONE).annotate(
+                month=TruncMonth('timestamp', output_field=DateField())
+            ).order_by().values('user_id', 'month').annotate(
+                amount=Sum('amount')
+            )
+        ))
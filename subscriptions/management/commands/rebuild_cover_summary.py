@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from subscriptions.constants import COVER_SUMMARY_REPORT
+from subscriptions.functions import refresh_cover_summary
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает минимальную цену и максимальный кэшбек обложек'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(
+            COVER_SUMMARY_REPORT.format(count=refresh_cover_summary())
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from subscriptions.constants import MONTHLY_EXPENSES_REPORT
+from subscriptions.functions import rebuild_monthly_expenses
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает расходы пользователей по месяцам'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(
+            MONTHLY_EXPENSES_REPORT.format(count=rebuild_monthly_expenses())
+        ))
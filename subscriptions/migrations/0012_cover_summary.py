@@ -0,0 +1,44 @@
+# Generated by Django 5.0.3 on 2026-10-18 10:18
+
+from django.db import migrations, models
+from django.db.models import Max, Min, OuterRef, Subquery
+from django.db.models.functions import Least
+
+
+def fill_cover_summary(apps, schema_editor):
+    Cover = apps.get_model('subscriptions', 'Cover')
+    Subscription = apps.get_model('subscriptions', 'Subscription')
+    subscriptions = Subscription.objects.filter(
+        cover=OuterRef('pk')
+    ).order_by().values('cover')
+    Cover.objects.update(
+        min_price=Subquery(subscriptions.annotate(value=Least(
+            Min('monthly_price'),
+            Min('semi_annual_price'),
+            Min('annual_price')
+        )).values('value')),
+        max_cashback_percent=Subquery(subscriptions.annotate(
+            value=Max('cashback_percent')
+        ).values('value'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0011_alter_cover_preview'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cover',
+            name='max_cashback_percent',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=5, null=True, verbose_name='Максимальный % кэшбека'),
+        ),
+        migrations.AddField(
+            model_name='cover',
+            name='min_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=7, null=True, verbose_name='Минимальная цена подписки'),
+        ),
+        migrations.RunPython(fill_cover_summary, migrations.RunPython.noop),
+    ]
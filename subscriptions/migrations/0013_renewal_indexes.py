@@ -0,0 +1,25 @@
+# Generated by Django 5.0.3 on 2026-10-18 10:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0012_cover_summary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'status', 'timestamp'], name='transaction_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usersubscription',
+            index=models.Index(condition=models.Q(('autorenewal', True)), fields=['end_date'], name='usersubscription_renewal_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usersubscription',
+            index=models.Index(fields=['user', '-end_date'], name='usersubscription_user_end_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.3 on 2026-10-18 10:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0013_renewal_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usersubscription',
+            index=models.Index(fields=['start_date'], name='usersubscription_start_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.3 on 2026-10-18 10:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0014_usersubscription_start_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PromocodeSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+            options={
+                'verbose_name': 'Номер промокода',
+                'verbose_name_plural': 'Номера промокодов',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='usersubscription',
+            constraint=models.UniqueConstraint(condition=models.Q(('promocode', ''), _negated=True), fields=('promocode',), name='unique_promocode'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.0.3 on 2026-10-18 10:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import DateField, Sum
+from django.db.models.functions import TruncMonth
+
+
+def fill_monthly_expenses(apps, schema_editor):
+    MonthlyExpense = apps.get_model('subscriptions', 'MonthlyExpense')
+    Transaction = apps.get_model('subscriptions', 'Transaction')
+    MonthlyExpense.objects.bulk_create(
+        MonthlyExpense(**expense)
+        for expense in Transaction.objects.filter(status='done').annotate(
+            month=TruncMonth('timestamp', output_field=DateField())
+        ).order_by().values('user_id', 'month').annotate(
+            amount=Sum('amount')
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0015_promocode_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyExpense',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(verbose_name='Месяц')),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Сумма')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_expenses', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Расходы за месяц',
+                'verbose_name_plural': 'Расходы за месяц',
+                'ordering': ('-month',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='monthlyexpense',
+            constraint=models.UniqueConstraint(fields=('user', 'month'), name='unique_user_month'),
+        ),
+        migrations.RunPython(fill_monthly_expenses, migrations.RunPython.noop),
+    ]
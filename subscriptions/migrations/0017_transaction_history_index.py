@@ -0,0 +1,17 @@
+# Generated by Django 5.0.3 on 2026-10-18 10:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0016_monthlyexpense'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', '-timestamp', '-id'], name='transaction_user_history_idx'),
+        ),
+    ]
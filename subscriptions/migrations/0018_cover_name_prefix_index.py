@@ -0,0 +1,35 @@
+from django.db import migrations
+
+INDEX_NAME = 'cover_name_prefix_idx'
+CREATE_INDEX = {
+    'postgresql': (
+        f'CREATE INDEX {INDEX_NAME} ON subscriptions_cover '
+        '(UPPER(name::text) text_pattern_ops)'
+    ),
+    'sqlite': (
+        f'CREATE INDEX {INDEX_NAME} ON subscriptions_cover '
+        '(name COLLATE NOCASE)'
+    ),
+}
+
+
+def create_index(apps, schema_editor):
+    sql = CREATE_INDEX.get(schema_editor.connection.vendor)
+    if sql:
+        schema_editor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor in CREATE_INDEX:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0017_transaction_history_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.3 on 2026-10-18 10:34
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0018_cover_name_prefix_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SmsMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True, verbose_name='Ключ дедупликации')),
+                ('text', models.TextField(verbose_name='Текст')),
+                ('sender', models.CharField(max_length=16, verbose_name='Отправитель')),
+                ('recipient', models.CharField(max_length=16, verbose_name='Получатель')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает отправки'), ('sent', 'Отправлено'), ('failed', 'Не отправлено')], default='pending', max_length=7, verbose_name='Статус')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Попыток отправки')),
+                ('next_attempt', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Следующая попытка')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('sent', models.DateTimeField(blank=True, null=True, verbose_name='Отправлено')),
+            ],
+            options={
+                'verbose_name': 'Смс',
+                'verbose_name_plural': 'Очередь смс',
+                'ordering': ('next_attempt', 'id'),
+                'indexes': [models.Index(condition=models.Q(('status', 'pending')), fields=['next_attempt', 'id'], name='smsmessage_pending_idx')],
+            },
+        ),
+    ]
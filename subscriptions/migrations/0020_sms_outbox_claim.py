@@ -0,0 +1,27 @@
+# Generated by Django 5.0.3 on 2026-10-18 10:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0019_sms_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='smsmessage',
+            name='claimed',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Взято в отправку'),
+        ),
+        migrations.AlterField(
+            model_name='smsmessage',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Ожидает отправки'), ('sending', 'Отправляется'), ('sent', 'Отправлено'), ('failed', 'Не отправлено')], default='pending', max_length=7, verbose_name='Статус'),
+        ),
+        migrations.AddIndex(
+            model_name='smsmessage',
+            index=models.Index(condition=models.Q(('status', 'sending')), fields=['claimed'], name='smsmessage_sending_idx'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator, RegexValidator
 from django.db import models
+from django.utils import timezone
 
 from .constants import (
     COVER,
@@ -11,12 +12,19 @@ from .constants import (
     LENGTH_LIMITS_PRICE_FIELDS,
     LENGTH_LIMIT_ACCOUNT_FIELD,
     LENGTH_LIMIT_PHONE_NUMBER_FIELD,
+    LENGTH_LIMIT_SMS_KEY_FIELD,
+    LENGTH_LIMIT_SMS_SENDER_FIELD,
     LENGTH_LIMITS_LINK_FIELDS,
     MIN_VALUE_DECIMAL_FIELDS,
     MONTH,
+    MONTHLY_EXPENSE,
     PHONE_NUMBER_ERROR_MESSAGE,
     PROMOCODE_ERROR_MESSAGE,
     PROMOCODE_LENGHT,
+    SMS_MESSAGE,
+    SMS_PENDING,
+    SMS_SENDING,
+    SMS_STATUS,
     SUBSCRIPTION,
     SUBSCRIPTION_PERIOD,
     TRANSACTION,
@@ -119,6 +127,22 @@ class Cover(models.Model):
         Category,
         verbose_name='Категории'
     )
+    min_price = models.DecimalField(
+        'Минимальная цена подписки',
+        max_digits=LENGTH_LIMITS_PRICE_FIELDS,
+        decimal_places=DECIMAL_PLACES,
+        null=True,
+        blank=True,
+        editable=False
+    )
+    max_cashback_percent = models.DecimalField(
+        'Максимальный % кэшбека',
+        max_digits=5,
+        decimal_places=DECIMAL_PLACES,
+        null=True,
+        blank=True,
+        editable=False
+    )
 
     class Meta:
         ordering = ('name',)
@@ -251,10 +275,32 @@ class UserSubscription(models.Model):
         ordering = ('-end_date', 'price')
         verbose_name = 'Пользователь/Подписка'
         verbose_name_plural = 'Пользователи/Подписки'
-        constraints = [models.UniqueConstraint(
-            fields=['user', 'subscription'],
-            name='unique_user_subscription'
-        )]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'subscription'],
+                name='unique_user_subscription'
+            ),
+            models.UniqueConstraint(
+                fields=['promocode'],
+                condition=~models.Q(promocode=''),
+                name='unique_promocode'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['end_date'],
+                condition=models.Q(autorenewal=True),
+                name='usersubscription_renewal_idx'
+            ),
+            models.Index(
+                fields=['user', '-end_date'],
+                name='usersubscription_user_end_idx'
+            ),
+            models.Index(
+                fields=['start_date'],
+                name='usersubscription_start_idx'
+            ),
+        ]
 
     def __str__(self):
         return USER_SUBSCRIPTION.format(
@@ -268,6 +314,14 @@ class UserSubscription(models.Model):
         )
 
 
+class PromocodeSequence(models.Model):
+    """Последовательность номеров для генерации промокодов"""
+
+    class Meta:
+        verbose_name = 'Номер промокода'
+        verbose_name_plural = 'Номера промокодов'
+
+
 class Card(models.Model):
     user = models.ForeignKey(
         User,
@@ -321,6 +375,16 @@ class Transaction(models.Model):
         ordering = ('timestamp',)
         verbose_name = 'Транзакция'
         verbose_name_plural = 'Транзакции'
+        indexes = [
+            models.Index(
+                fields=['user', 'status', 'timestamp'],
+                name='transaction_user_status_idx'
+            ),
+            models.Index(
+                fields=['user', '-timestamp', '-id'],
+                name='transaction_user_history_idx'
+            ),
+        ]
 
     def __str__(self):
         return TRANSACTION.format(
@@ -330,3 +394,92 @@ class Transaction(models.Model):
             timestamp=self.timestamp,
             status=self.status
         )
+
+
+class MonthlyExpense(models.Model):
+    """Сумма выполненных платежей пользователя за месяц"""
+    user = models.ForeignKey(
+        User,
+        related_name='monthly_expenses',
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь'
+    )
+    month = models.DateField('Месяц')
+    amount = models.DecimalField(
+        'Сумма',
+        max_digits=LENGTH_LIMIT_ACCOUNT_FIELD,
+        decimal_places=DECIMAL_PLACES,
+        default=0
+    )
+
+    class Meta:
+        ordering = ('-month',)
+        verbose_name = 'Расходы за месяц'
+        verbose_name_plural = 'Расходы за месяц'
+        constraints = [models.UniqueConstraint(
+            fields=['user', 'month'],
+            name='unique_user_month'
+        )]
+
+    def __str__(self):
+        return MONTHLY_EXPENSE.format(
+            user=self.user.phone_number,
+            month=self.month,
+            amount=self.amount
+        )
+
+
+class SmsMessage(models.Model):
+    """Исходящее смс в очереди на отправку"""
+    key = models.CharField(
+        'Ключ дедупликации',
+        max_length=LENGTH_LIMIT_SMS_KEY_FIELD,
+        unique=True
+    )
+    text = models.TextField('Текст')
+    sender = models.CharField(
+        'Отправитель',
+        max_length=LENGTH_LIMIT_SMS_SENDER_FIELD
+    )
+    recipient = models.CharField(
+        'Получатель',
+        max_length=LENGTH_LIMIT_SMS_SENDER_FIELD
+    )
+    status = models.CharField(
+        'Статус',
+        max_length=max(len(status) for status, _ in SMS_STATUS),
+        default=SMS_PENDING,
+        choices=SMS_STATUS
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток отправки', default=0)
+    next_attempt = models.DateTimeField(
+        'Следующая попытка',
+        default=timezone.now
+    )
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    claimed = models.DateTimeField('Взято в отправку', null=True, blank=True)
+    sent = models.DateTimeField('Отправлено', null=True, blank=True)
+
+    class Meta:
+        ordering = ('next_attempt', 'id')
+        verbose_name = 'Смс'
+        verbose_name_plural = 'Очередь смс'
+        indexes = [
+            models.Index(
+                fields=['next_attempt', 'id'],
+                condition=models.Q(status=SMS_PENDING),
+                name='smsmessage_pending_idx'
+            ),
+            models.Index(
+                fields=['claimed'],
+                condition=models.Q(status=SMS_SENDING),
+                name='smsmessage_sending_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return SMS_MESSAGE.format(
+            recipient=self.recipient,
+            status=self.status,
+            attempts=self.attempts
+        )
@@ -0,0 +1,35 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import invalidate_user_subscriptions
+from .functions import refresh_cover_summary
+from .models import Subscription, UserSubscription
+
+
+@receiver(pre_save, sender=Subscription)
+def remember_subscription_cover(sender, instance, **kwargs):
+    """Запоминает прежнюю обложку при переносе подписки"""
+    instance.previous_cover_id = Subscription.objects.filter(
+        pk=instance.pk
+    ).values_list('cover_id', flat=True).first() if instance.pk else None
+
+
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def update_cover_summary(sender, instance, **kwargs):
+    """Обновление цены и кэшбека обложки при изменении подписок"""
+    refresh_cover_summary({
+        instance.cover_id,
+        getattr(instance, 'previous_cover_id', None)
+    } - {None})
+
+
+@receiver(post_save, sender=UserSubscription)
+@receiver(post_delete, sender=UserSubscription)
+def usersubscription_changed(sender, instance, **kwargs):
+    """Сброс кэша подписок пользователя после изменения его подписок"""
+    transaction.on_commit(
+        partial(invalidate_user_subscriptions, instance.user_id))